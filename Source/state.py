@@ -1,67 +1,327 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 from collections import deque
-import copy
+from array import array
 import heapq
 import time
 import random
 import math
-import uuid
+import itertools
 import logging
+import mmap
+import os
+import struct
+import zlib
 import numpy as np
 
 
+BOARD_SIZE = 3
+CELL_COUNT = BOARD_SIZE * BOARD_SIZE
+CELL_BITS = 4
+CELL_MASK = (1 << CELL_BITS) - 1
+DEFAULT_GOAL = ((1, 2, 3), (4, 5, 6), (7, 8, 0))
+
+HEURISTIC_STRATEGIES = frozenset([
+    "Greedy", "A*", "IDA*", "Simple Hill Climbing", "Steepest-Hill Climbing",
+    "Stochastic Hill Climbing", "Simulated Annealing", "DFS",
+    "Search with Partial Observations", "Backtracking", "AC3",
+    "Generate and Test", "Q-Learning", "Genetic Algorithm", "Local Beam Search",
+    "AND-OR Graph Search"])
+
+# Heuristic name -> (combine, HeuristicContext evaluators). Single evaluators
+# need no combine; max of admissible heuristics stays admissible, sums do not
+# and are meant for Greedy and the local searches.
+DEFAULT_HEURISTIC = "Manhattan"
+HEURISTICS = {
+    "Manhattan": (None, ("manhattan",)),
+    "Linear Conflict": (None, ("linear_conflict",)),
+    "Walking Distance": (None, ("walking_distance",)),
+    "Max(Linear Conflict, Walking Distance)": (max, ("linear_conflict", "walking_distance")),
+    "Manhattan + Walking Distance": (sum, ("manhattan", "walking_distance")),
+    "Pattern Database (4-4)": (None, ("pattern_database",)),
+    "Pattern Database (5-3)": (None, ("pattern_database",)),
+}
+# Disjoint tile groups of the additive pattern databases; each group's table
+# only counts moves of its own tiles, so the per-group costs can be summed.
+PATTERN_PARTITIONS = {
+    "Pattern Database (4-4)": ((1, 2, 3, 4), (5, 6, 7, 8)),
+    "Pattern Database (5-3)": ((1, 2, 3, 4, 5), (6, 7, 8)),
+}
+HEURISTIC_SELECTABLE_STRATEGIES = frozenset([
+    "Greedy", "A*", "IDA*", "Simple Hill Climbing", "Steepest-Hill Climbing",
+    "Stochastic Hill Climbing", "Simulated Annealing", "AND-OR Graph Search"])
+# Strategies that run on any N x N board; the rest rely on 3x3-only tables
+# (dense ranks, distance files, the belief and Q-learning encodings).
+GEOMETRY_STRATEGIES = frozenset([
+    "BFS", "Bidirectional BFS", "DFS", "UCS", "IDS", "Greedy", "A*", "IDA*",
+    "Simple Hill Climbing",
+    "Steepest-Hill Climbing", "Stochastic Hill Climbing", "Simulated Annealing",
+    "Local Beam Search", "Genetic Algorithm"])
+
+
+ACTIONS = ("up", "down", "left", "right")
+ACTION_DELTAS = {"up": (-1, 0), "down": (1, 0), "left": (0, -1), "right": (0, 1)}
+REVERSE_ACTION = {"up": "down", "down": "up", "left": "right", "right": "left"}
+
+
+def build_move_table(size):
+    # For every blank cell: (target cell, action label, reverse action label).
+    table = []
+    for blank in range(size * size):
+        i, j = divmod(blank, size)
+        moves = []
+        for action in ACTIONS:
+            di, dj = ACTION_DELTAS[action]
+            new_i, new_j = i + di, j + dj
+            if 0 <= new_i < size and 0 <= new_j < size:
+                moves.append((new_i * size + new_j, action, REVERSE_ACTION[action]))
+        table.append(tuple(moves))
+    return tuple(table)
+
+
+class BoardGeometry:
+    # Everything that depends on the board width: how cells are packed into
+    # an int, the blank's move table and the default goal. cell_bits stays 4
+    # up to the 15-puzzle and grows for larger boards. Only the 3x3 state
+    # space is small enough to rank densely (rank_state, distance tables);
+    # other widths key their closed sets on the packed board itself.
+    __slots__ = ("size", "cell_count", "cell_bits", "cell_mask", "move_table",
+                 "move_targets", "action_targets", "default_goal", "rankable")
+
+    def __init__(self, size):
+        if size < 2:
+            raise ValueError(f"Board width must be at least 2, got {size}")
+        self.size = size
+        self.cell_count = size * size
+        self.cell_bits = max(CELL_BITS, (self.cell_count - 1).bit_length())
+        self.cell_mask = (1 << self.cell_bits) - 1
+        self.move_table = build_move_table(size)
+        self.move_targets = tuple(tuple(target for target, _, _ in moves)
+                                  for moves in self.move_table)
+        self.action_targets = tuple({action: target for target, action, _ in moves}
+                                    for moves in self.move_table)
+        self.default_goal = tuple(tuple((i * size + j + 1) % self.cell_count
+                                        for j in range(size)) for i in range(size))
+        self.rankable = self.cell_count == CELL_COUNT
+
+    def unpack(self, packed):
+        size, bits, mask = self.size, self.cell_bits, self.cell_mask
+        return [[(packed >> ((i * size + j) * bits)) & mask
+                 for j in range(size)] for i in range(size)]
+
+    def cells(self, packed):
+        bits, mask = self.cell_bits, self.cell_mask
+        return [(packed >> (k * bits)) & mask for k in range(self.cell_count)]
+
+    def pack_cells(self, cells):
+        packed = 0
+        for k, val in enumerate(cells):
+            packed |= val << (k * self.cell_bits)
+        return packed
+
+    def blank(self, packed):
+        bits, mask = self.cell_bits, self.cell_mask
+        for k in range(self.cell_count):
+            if not (packed >> (k * bits)) & mask:
+                return k
+        logging.error(f"No blank tile in packed board: {packed:#x}")
+        raise ValueError("Invalid board: No blank tile (0) found")
+
+    def move(self, packed, blank, target):
+        tile = (packed >> (target * self.cell_bits)) & self.cell_mask
+        return packed - (tile << (target * self.cell_bits)) + (tile << (blank * self.cell_bits))
+
+    def successors(self, packed, blank):
+        bits, mask = self.cell_bits, self.cell_mask
+        blank_shift = blank * bits
+        return [(packed + ((tile := (packed >> (target * bits)) & mask) << blank_shift)
+                 - (tile << (target * bits)), target)
+                for target in self.move_targets[blank]]
+
+    def parity(self, packed):
+        # Reachability class: tile inversion parity, plus the blank's row on
+        # even widths, where a vertical move carries a tile past an odd
+        # number of others.
+        flat = [num for num in self.cells(packed) if num != 0]
+        inversions = sum(1 for i in range(len(flat))
+                         for j in range(i + 1, len(flat)) if flat[i] > flat[j])
+        if self.size % 2 == 0:
+            inversions += self.blank(packed) // self.size
+        return inversions % 2
+
+    def state_key(self, packed, blank):
+        return rank_state(packed, blank) if self.rankable else packed
+
+    def visited_set(self):
+        # Closed set over state_key values.
+        return StateBitmap() if self.rankable else set()
+
+    def cost_table(self, typecode="I"):
+        # Best cost per state_key; unseen states read as the typecode's max.
+        if self.rankable:
+            return new_cost_table(typecode)
+        return CostDict((1 << (8 * array(typecode).itemsize)) - 1)
+
+
+class CostDict(dict):
+    # Sparse stand-in for new_cost_table: missing keys read as `unseen`
+    # without being stored.
+    __slots__ = ("unseen",)
+
+    def __init__(self, unseen):
+        super().__init__()
+        self.unseen = unseen
+
+    def __missing__(self, key):
+        return self.unseen
+
+
+GEOMETRY_CACHE = {}
+
+
+def get_geometry(size):
+    geometry = GEOMETRY_CACHE.get(size)
+    if geometry is None:
+        geometry = GEOMETRY_CACHE[size] = BoardGeometry(size)
+    return geometry
+
+
+DEFAULT_GEOMETRY = get_geometry(BOARD_SIZE)
+MOVE_TABLE = DEFAULT_GEOMETRY.move_table
+MOVE_TARGETS = DEFAULT_GEOMETRY.move_targets
+ACTION_TARGETS = DEFAULT_GEOMETRY.action_targets
+
+
+def board_geometry(board):
+    # Bare packed ints carry no width and are taken to be 3x3.
+    if isinstance(board, PuzzleState):
+        return board.context.geometry
+    if isinstance(board, int):
+        return DEFAULT_GEOMETRY
+    try:
+        return get_geometry(len(board))
+    except TypeError:
+        logging.error(f"Invalid board for board_geometry: {board}")
+        raise ValueError("Board must be a square list or tuple of lists/tuples")
+
+
+def pack_board(board):
+    # Cell k (row-major) lives in bits [k * cell_bits, (k + 1) * cell_bits)
+    # of a single int; cell_bits comes from the board's BoardGeometry.
+    if isinstance(board, int):
+        return board
+    if isinstance(board, PuzzleState):
+        return board.packed
+    geometry = board_geometry(board)
+    try:
+        packed = 0
+        shift = 0
+        for row in board:
+            for val in row:
+                packed |= val << shift
+                shift += geometry.cell_bits
+    except TypeError as e:
+        logging.error(f"Invalid board for pack_board: {board}, error={str(e)}")
+        raise ValueError("Board must be a square list or tuple of lists/tuples")
+    if shift != geometry.cell_count * geometry.cell_bits:
+        logging.error(f"Invalid board size for pack_board: {board}")
+        raise ValueError("Board must be a square list or tuple of lists/tuples")
+    return packed
+
+
+def unpack_board(packed, geometry=None):
+    return (geometry or DEFAULT_GEOMETRY).unpack(packed)
+
+
+def packed_cells(packed, geometry=None):
+    return (geometry or DEFAULT_GEOMETRY).cells(packed)
+
+
+def pack_cells(cells, geometry=None):
+    if geometry is None:
+        geometry = get_geometry(math.isqrt(len(cells)))
+    return geometry.pack_cells(cells)
+
+
+def packed_blank(packed, geometry=None):
+    return (geometry or DEFAULT_GEOMETRY).blank(packed)
+
+
+def move_blank(packed, blank, target, geometry=None):
+    return (geometry or DEFAULT_GEOMETRY).move(packed, blank, target)
+
+
 class PuzzleState:
-    def __init__(self, board, moves=0, previous=None, strategy=None):
-        self.board = copy.deepcopy(board)
+    __slots__ = ("packed", "blank", "moves", "previous", "strategy", "context", "h")
+
+    def __init__(self, board, moves=0, previous=None, strategy=None, blank=None, context=None,
+                 h=None):
+        if context is None:
+            if previous is not None:
+                context = previous.context
+            else:
+                geometry = board_geometry(board)
+                context = DEFAULT_CONTEXT if geometry is DEFAULT_GEOMETRY else \
+                    get_heuristic_context(geometry.default_goal)
+        self.context = context
+        self.packed = pack_board(board)
+        self.blank = context.geometry.blank(self.packed) if blank is None else blank
         self.moves = moves
         self.previous = previous
         self.strategy = strategy
-        self._hash = None
-        self.h = self._calculate_heuristic() if strategy in [
-            "Greedy", "A*", "IDA*", "Simple Hill Climbing", "Steepest-Hill Climbing",
-            "Stochastic Hill Climbing", "Simulated Annealing", "DFS",
-            "Search with Partial Observations", "Backtracking", "AC3",
-            "Generate and Test", "Q-Learning", "Genetic Algorithm", "Local Beam Search",
-            "AND-OR Graph Search"] else 0
+        if h is None:
+            h = self._calculate_heuristic() if strategy in HEURISTIC_STRATEGIES else 0
+        self.h = h
+
+    @property
+    def board(self):
+        return self.context.geometry.unpack(self.packed)
 
     def __eq__(self, other):
         if not isinstance(other, PuzzleState):
             return False
-        return self.board == other.board
+        return self.packed == other.packed
 
     def __hash__(self):
-        if self._hash is None:
-            self._hash = hash(tuple(tuple(row) for row in self.board))
-        return self._hash
+        return hash(self.packed)
 
     def __lt__(self, other):
-        h1, h2 = self._calculate_heuristic(), other._calculate_heuristic()
+        return self.priority() < other.priority()
+
+    def priority(self):
+        # Frontier key for the best-first strategies, built from cached values
+        # only; queues store it alongside the state so heapq never calls back
+        # into __lt__.
         if self.strategy == "UCS":
-            return self.moves < other.moves
-        elif self.strategy == "Greedy":
-            return h1 < h2
-        elif self.strategy in ["Genetic Algorithm", "Local Beam Search"]:
-            return h1 < h2
-        return (self.moves + h1) < (other.moves + h2)
+            return self.moves
+        elif self.strategy in ["Greedy", "Genetic Algorithm", "Local Beam Search"]:
+            return self.h
+        return self.moves + self.h
 
     def _calculate_heuristic(self):
-        goal_pos = {1: (0, 0), 2: (0, 1), 3: (0, 2), 4: (1, 0), 5: (1, 1),
-                    6: (1, 2), 7: (2, 0), 8: (2, 1), 0: (2, 2)}
-        return sum(abs(i - goal_pos[val][0]) + abs(j - goal_pos[val][1])
-                   for i in range(3) for j in range(3) if (val := self.board[i][j]) != 0)
+        return self.context.evaluate(self.packed)
+
+    def successors(self):
+        if self.strategy in HEURISTIC_STRATEGIES:
+            return [PuzzleState(new_packed, self.moves + 1, self, self.strategy, new_blank, h=new_h)
+                    for new_packed, new_blank, new_h
+                    in self.context.successors(self.packed, self.blank, self.h)]
+        return [PuzzleState(new_packed, self.moves + 1, self, self.strategy, new_blank)
+                for new_packed, new_blank in self.context.geometry.successors(self.packed, self.blank)]
 
 
 def find_blank(board):
     try:
         if isinstance(board, PuzzleState):
-            board = board.board
-        elif isinstance(board, tuple):
+            return divmod(board.blank, board.context.geometry.size)
+        if isinstance(board, int):
+            return divmod(packed_blank(board), BOARD_SIZE)
+        if isinstance(board, tuple):
             logging.warning("find_blank received tuple; converting to list")
             board = [list(row) for row in board]
-        for i in range(3):
-            for j in range(3):
-                if board[i][j] == 0:
+        for i, row in enumerate(board):
+            for j, val in enumerate(row):
+                if val == 0:
                     return i, j
         logging.error(f"No blank tile in board: {board}")
         raise ValueError("Invalid board: No blank tile (0) found")
@@ -71,68 +331,289 @@ def find_blank(board):
         raise ValueError("Invalid board format")
 
 
-def is_valid(x, y):
-    return 0 <= x < 3 and 0 <= y < 3
+def is_valid(x, y, size=BOARD_SIZE):
+    return 0 <= x < size and 0 <= y < size
 
 
 def get_new_state(board, old_x, old_y, new_x, new_y):
-    new_board = copy.deepcopy(board)
+    new_board = [list(row) for row in board]
     new_board[old_x][old_y], new_board[new_x][new_y] = new_board[new_x][new_y], new_board[old_x][old_y]
     return new_board
 
 
+def get_successors(packed, blank, geometry=None):
+    return (geometry or DEFAULT_GEOMETRY).successors(packed, blank)
+
+
 def get_possible_moves(board):
     try:
-        if isinstance(board, PuzzleState):
-            board = board.board
-        elif isinstance(board, tuple):
-            logging.warning(
-                "get_possible_moves received tuple; converting to list")
-            board = [list(row) for row in board]
-        i, j = find_blank(board)
+        geometry = board_geometry(board)
+        packed = pack_board(board)
+        blank = board.blank if isinstance(
+            board, PuzzleState) else geometry.blank(packed)
     except ValueError:
         logging.debug("get_possible_moves: No blank tile found")
         return []
-    directions = [(-1, 0), (1, 0), (0, -1), (0, 1)]
-    possible_states = []
-    for dx, dy in directions:
-        new_i, new_j = i + dx, j + dy
-        if 0 <= new_i < 3 and 0 <= new_j < 3:
-            new_board = [[board[i][j] for j in range(3)] for i in range(3)]
-            new_board[i][j], new_board[new_i][new_j] = new_board[new_i][new_j], new_board[i][j]
-            possible_states.append(new_board)
-    return possible_states
+    return [new_packed for new_packed, _ in geometry.successors(packed, blank)]
 
 
 def get_hash(board):
-    try:
-        if isinstance(board, PuzzleState):
-            logging.debug("get_hash received PuzzleState; extracting board")
-            board = board.board
-        elif isinstance(board, tuple):
-            logging.warning("get_hash received tuple; converting to list")
-            board = [list(row) for row in board]
-        board_tuple = tuple(tuple(row) for row in board)
-        return hash(board_tuple)
-    except (TypeError, IndexError) as e:
-        logging.error(f"Invalid board for get_hash: {board}, error={str(e)}")
-        raise ValueError("Board must be a 3x3 list or tuple of lists/tuples")
+    # The packed representation is already a collision-free key.
+    return pack_board(board)
+
+
+class HeuristicContext:
+    # Goal-specific lookup tables, built once per goal and shared by every
+    # state of a search. With n = geometry.cell_count,
+    # tile_distance[tile * n + cell] is the Manhattan distance of `tile`
+    # standing on `cell`; tile 0 costs nothing.
+    # move_delta[(tile * n + source) * n + dest] is the change in that
+    # distance when `tile` slides from `source` into the blank at `dest`, so
+    # a successor's h is its parent's h plus one lookup. distance_grid is
+    # tile_distance as a (tile, cell) NumPy array for whole batches of
+    # boards. The tables for the other HEURISTICS are only built when the
+    # context evaluates them.
+    __slots__ = ("geometry", "goal_packed", "goal_cell", "goal_row", "goal_col",
+                 "tile_distance", "distance_grid", "move_delta", "heuristic", "evaluate",
+                 "incremental", "line_conflict", "conflict_code", "conflict_span",
+                 "walking_code", "walking_span", "row_walk", "col_walk",
+                 "pattern_code", "pattern_spans", "pattern_tables")
+
+    def __init__(self, goal, heuristic=None, geometry=None):
+        self.geometry = board_geometry(goal) if geometry is None else geometry
+        self.goal_packed = pack_board(goal)
+        self.heuristic = DEFAULT_HEURISTIC if heuristic is None else heuristic
+        if self.heuristic not in HEURISTICS:
+            raise ValueError(f"Unknown heuristic: {self.heuristic}")
+        size, count = self.geometry.size, self.geometry.cell_count
+        tile_slots = self.geometry.cell_mask + 1
+        self.goal_cell = [0] * tile_slots
+        for cell, tile in enumerate(self.geometry.cells(self.goal_packed)):
+            self.goal_cell[tile] = cell
+        self.goal_row = [cell // size for cell in self.goal_cell]
+        self.goal_col = [cell % size for cell in self.goal_cell]
+        self.tile_distance = [0] * (tile_slots * count)
+        for tile in range(1, count):
+            for cell in range(count):
+                i, j = divmod(cell, size)
+                self.tile_distance[tile * count + cell] = (
+                    abs(i - self.goal_row[tile]) + abs(j - self.goal_col[tile]))
+        self.distance_grid = np.array(self.tile_distance, dtype=np.uint8).reshape(
+            tile_slots, count)
+        self.move_delta = [0] * (tile_slots * count * count)
+        for tile in range(1, count):
+            base = tile * count
+            for source in range(count):
+                for dest in range(count):
+                    self.move_delta[(base + source) * count + dest] = (
+                        self.tile_distance[base + dest] - self.tile_distance[base + source])
+        combine, components = HEURISTICS[self.heuristic]
+        if "linear_conflict" in components:
+            self._build_conflict_tables()
+        if "walking_distance" in components:
+            self._build_walking_tables()
+        if "pattern_database" in components:
+            self._load_pattern_tables(PATTERN_PARTITIONS[self.heuristic])
+        evaluators = [getattr(self, name) for name in components]
+        self.incremental = components == ("manhattan",)
+        if combine is None:
+            self.evaluate = evaluators[0]
+        else:
+            self.evaluate = lambda packed: combine(
+                evaluate(packed) for evaluate in evaluators)
+
+    def _build_conflict_tables(self):
+        # Every tile adds one base (size + 1) digit to the key of the row and
+        # of the column it stands on: its goal column (row) plus one when that
+        # row (column) is its goal line, else 0. line_conflict[key] is the
+        # penalty of such a line: two moves for every tile that has to leave
+        # it so the others can pass each other. conflict_code stacks a
+        # (tile, cell)'s row and column digits at a stride of conflict_span
+        # per line, so one sum over the board yields all 2 * size line keys.
+        def longest_increasing(values):
+            best = [1] * len(values)
+            for i in range(len(values)):
+                for k in range(i):
+                    if values[k] < values[i]:
+                        best[i] = max(best[i], best[k] + 1)
+            return max(best, default=0)
+
+        size, count = self.geometry.size, self.geometry.cell_count
+        base = size + 1
+        self.conflict_span = span = base ** size
+        self.line_conflict = bytearray(span)
+        for key in range(span):
+            positions = [digit for digit in ((key // base ** k) % base for k in range(size))
+                         if digit]
+            self.line_conflict[key] = 2 * (len(positions) - longest_increasing(positions))
+        self.conflict_code = [0] * ((self.geometry.cell_mask + 1) * count)
+        for tile in range(1, count):
+            for cell in range(count):
+                i, j = divmod(cell, size)
+                code = 0
+                if self.goal_row[tile] == i:
+                    code += (self.goal_col[tile] + 1) * base ** j * span ** i
+                if self.goal_col[tile] == j:
+                    code += (self.goal_row[tile] + 1) * base ** i * span ** (size + j)
+                self.conflict_code[tile * count + cell] = code
+
+    def _build_walking_tables(self):
+        # Walking distance: a row pattern counts, for every row, how many of
+        # its tiles belong to each goal row; a move carries one tile across
+        # the blank's row boundary. Patterns are base (size + 1) numbers with
+        # digit size * row + goal_row, and a BFS from the goal's pattern gives
+        # the exact cost of that relaxation. Columns are the same problem
+        # transposed. walking_code holds each (tile, cell)'s row digit plus
+        # its column digit scaled by walking_span, so one sum over the board
+        # yields both patterns.
+        size, count = self.geometry.size, self.geometry.cell_count
+        base = size + 1
+        goal_cells = self.geometry.cells(self.goal_packed)
+        goal_blank = goal_cells.index(0)
+        self.walking_span = base ** count
+
+        def walk_table(cell_line, goal_line):
+            start = sum(base ** (size * cell_line(cell) + goal_line[tile])
+                        for cell, tile in enumerate(goal_cells) if tile)
+            table = {start: 0}
+            frontier = deque([(start, cell_line(goal_blank))])
+            while frontier:
+                pattern, blank = frontier.popleft()
+                for line in (blank - 1, blank + 1):
+                    if not 0 <= line < size:
+                        continue
+                    for target in range(size):
+                        source = base ** (size * line + target)
+                        if (pattern // source) % base:
+                            new_pattern = pattern - source + base ** (size * blank + target)
+                            if new_pattern not in table:
+                                table[new_pattern] = table[pattern] + 1
+                                frontier.append((new_pattern, line))
+            return table
+
+        self.row_walk = walk_table(lambda cell: cell // size, self.goal_row)
+        self.col_walk = walk_table(lambda cell: cell % size, self.goal_col)
+        self.walking_code = [0] * ((self.geometry.cell_mask + 1) * count)
+        for tile in range(1, count):
+            for cell in range(count):
+                i, j = divmod(cell, size)
+                self.walking_code[tile * count + cell] = (
+                    base ** (size * i + self.goal_row[tile])
+                    + self.walking_span * base ** (size * j + self.goal_col[tile]))
+
+    def _load_pattern_tables(self, partition):
+        # pattern_code[tile * CELL_COUNT + cell] places `cell` as a base
+        # CELL_COUNT digit of its group's table index; group indexes are
+        # stacked by pattern_spans so one sum over the board yields them all.
+        if self.geometry is not DEFAULT_GEOMETRY:
+            raise ValueError(
+                f"{self.heuristic} is only available for {BOARD_SIZE}x{BOARD_SIZE} boards")
+        self.pattern_tables = [get_pattern_table(self.goal_packed, tiles).tobytes()
+                               for tiles in partition]
+        self.pattern_spans = [CELL_COUNT ** len(tiles) for tiles in partition]
+        self.pattern_code = [0] * ((CELL_MASK + 1) * CELL_COUNT)
+        scale = 1
+        for tiles, span in zip(partition, self.pattern_spans):
+            for digit, tile in enumerate(tiles):
+                for cell in range(CELL_COUNT):
+                    self.pattern_code[tile * CELL_COUNT + cell] = \
+                        scale * cell * CELL_COUNT ** digit
+            scale *= span
+
+    def _board_code(self, packed, table):
+        # Sum of table[tile * cell_count + cell] over the board.
+        bits, mask = self.geometry.cell_bits, self.geometry.cell_mask
+        count = self.geometry.cell_count
+        code = 0
+        for cell in range(count):
+            code += table[((packed >> (cell * bits)) & mask) * count + cell]
+        return code
+
+    def manhattan(self, packed):
+        return self._board_code(packed, self.tile_distance)
+
+    def manhattan_rows(self, rows):
+        # Manhattan distance of every board in a (k, cell_count) array of
+        # cell values, in one gather over distance_grid.
+        cells = np.arange(self.geometry.cell_count)
+        return self.distance_grid[rows, cells].sum(axis=1, dtype=np.int32)
+
+    def pattern_database(self, packed):
+        code = self._board_code(packed, self.pattern_code)
+        total = 0
+        for pattern_table, span in zip(self.pattern_tables, self.pattern_spans):
+            code, index = divmod(code, span)
+            total += pattern_table[index]
+        return total
+
+    def linear_conflict(self, packed):
+        code = self._board_code(packed, self.conflict_code)
+        total = self.manhattan(packed)
+        for _ in range(2 * self.geometry.size):
+            code, key = divmod(code, self.conflict_span)
+            total += self.line_conflict[key]
+        return total
+
+    def walking_distance(self, packed):
+        code = self._board_code(packed, self.walking_code)
+        col_pattern, row_pattern = divmod(code, self.walking_span)
+        return self.row_walk[row_pattern] + self.col_walk[col_pattern]
+
+    def delta(self, packed, blank, target):
+        # Change in Manhattan distance when the blank at `blank` swaps with
+        # the tile at `target`.
+        count = self.geometry.cell_count
+        tile = (packed >> (target * self.geometry.cell_bits)) & self.geometry.cell_mask
+        return self.move_delta[(tile * count + target) * count + blank]
+
+    def successors(self, packed, blank, h):
+        # Same as BoardGeometry.successors, with each child's h derived from
+        # the parent's (or evaluated afresh when the heuristic is not plain
+        # Manhattan).
+        geometry = self.geometry
+        if not self.incremental:
+            return [(new_packed, target, self.evaluate(new_packed))
+                    for new_packed, target in geometry.successors(packed, blank)]
+        delta = self.move_delta
+        bits, mask, count = geometry.cell_bits, geometry.cell_mask, geometry.cell_count
+        blank_shift = blank * bits
+        result = []
+        for target in geometry.move_targets[blank]:
+            target_shift = target * bits
+            tile = (packed >> target_shift) & mask
+            result.append((packed + (tile << blank_shift) - (tile << target_shift), target,
+                           h + delta[(tile * count + target) * count + blank]))
+        return result
+
+
+HEURISTIC_CONTEXT_CACHE = {}
+
+
+def get_heuristic_context(goal, heuristic=None, geometry=None):
+    geometry = board_geometry(goal) if geometry is None else geometry
+    goal_packed = pack_board(goal)
+    key = (geometry.size, goal_packed, DEFAULT_HEURISTIC if heuristic is None else heuristic)
+    context = HEURISTIC_CONTEXT_CACHE.get(key)
+    if context is None:
+        context = HEURISTIC_CONTEXT_CACHE[key] = HeuristicContext(goal_packed, key[2], geometry)
+    return context
 
 
 def manhattan_distance(board, goal):
-    goal_pos = {val: (i, j) for i, row in enumerate(goal)
-                for j, val in enumerate(row) if val != 0}
-    return sum(abs(i - goal_pos[val][0]) + abs(j - goal_pos[val][1])
-               for i in range(3) for j in range(3) if (val := board[i][j]) in goal_pos)
+    return get_heuristic_context(goal).manhattan(pack_board(board))
+
+
+DEFAULT_GOAL_PACKED = pack_board(DEFAULT_GOAL)
+DEFAULT_CONTEXT = get_heuristic_context(DEFAULT_GOAL_PACKED)
+
+
+def tile_parity(board):
+    return board_geometry(board).parity(pack_board(board))
 
 
 def is_solvable(start_board, goal_board):
-    def get_inversions(board):
-        flat = [num for row in board for num in row if num != 0]
-        inversions = sum(1 for i in range(len(flat))
-                         for j in range(i + 1, len(flat)) if flat[i] > flat[j])
-        return inversions
-    return (get_inversions(start_board) % 2) == (get_inversions(goal_board) % 2)
+    return (board_geometry(start_board) is board_geometry(goal_board)
+            and tile_parity(start_board) == tile_parity(goal_board))
 
 
 def is_valid_move(prev_board, next_board):
@@ -140,31 +621,564 @@ def is_valid_move(prev_board, next_board):
         logging.debug("is_valid_move received empty board")
         return False
     try:
-        if isinstance(prev_board, PuzzleState):
-            prev_board = prev_board.board
-        elif isinstance(prev_board, tuple):
-            logging.warning(
-                "is_valid_move received tuple as prev_board; converting")
-            prev_board = [list(row) for row in prev_board]
-        if isinstance(next_board, PuzzleState):
-            next_board = next_board.board
-        elif isinstance(next_board, tuple):
-            logging.warning(
-                "is_valid_move received tuple as next_board; converting")
-            next_board = [list(row) for row in next_board]
-        prev_board = [[prev_board[i][j] for j in range(3)] for i in range(3)]
-        next_board = [[next_board[i][j] for j in range(3)] for i in range(3)]
-        blank_i, blank_j = find_blank(prev_board)
-        next_blank_i, next_blank_j = find_blank(next_board)
+        geometry = board_geometry(prev_board)
+        prev_packed = pack_board(prev_board)
+        next_packed = pack_board(next_board)
+        blank = geometry.blank(prev_packed)
+        next_blank = geometry.blank(next_packed)
+        blank_i, blank_j = divmod(blank, geometry.size)
+        next_blank_i, next_blank_j = divmod(next_blank, geometry.size)
         return (abs(blank_i - next_blank_i) + abs(blank_j - next_blank_j) == 1 and
-                all(prev_board[i][j] == next_board[i][j] for i in range(3) for j in range(3)
-                    if (i, j) not in [(blank_i, blank_j), (next_blank_i, next_blank_j)]))
+                geometry.move(prev_packed, blank, next_blank) == next_packed)
     except (TypeError, IndexError, ValueError) as e:
         logging.error(
             f"Invalid boards in is_valid_move: prev={prev_board}, next={next_board}, error={str(e)}")
         return False
 
 
+TILE_COUNT = CELL_COUNT - 1
+FACTORIALS = tuple(math.factorial(k) for k in range(CELL_COUNT))
+HALF_TILE_PERMUTATIONS = FACTORIALS[TILE_COUNT] // 2
+STATE_SPACE_SIZE = CELL_COUNT * HALF_TILE_PERMUTATIONS
+SMALLER_SEEN = bytes(bin(mask).count("1") for mask in range(1 << CELL_COUNT))
+
+
+def rank_state(packed, blank):
+    # Rank = blank cell * 8!/2 + Lehmer code of the tile order, halved.
+    # Swapping the last two tiles flips both the parity and the lowest
+    # Lehmer digit, so within one parity class code >> 1 is a bijection.
+    code = 0
+    seen = 0
+    k = TILE_COUNT - 1
+    for cell in range(CELL_COUNT):
+        tile = (packed >> (cell * CELL_BITS)) & CELL_MASK
+        if tile:
+            code += (tile - 1 - SMALLER_SEEN[seen & ((1 << tile) - 1)]) * FACTORIALS[k]
+            seen |= 1 << tile
+            k -= 1
+    return blank * HALF_TILE_PERMUTATIONS + (code >> 1)
+
+
+def unrank_state(rank, parity):
+    blank, code = divmod(rank, HALF_TILE_PERMUTATIONS)
+    code <<= 1
+    remaining = list(range(1, CELL_COUNT))
+    tiles = []
+    for k in range(TILE_COUNT - 1, -1, -1):
+        digit, code = divmod(code, FACTORIALS[k])
+        tiles.append(remaining.pop(digit))
+    inversions = sum(1 for i in range(TILE_COUNT)
+                     for j in range(i + 1, TILE_COUNT) if tiles[i] > tiles[j])
+    if inversions % 2 != parity:
+        tiles[-2], tiles[-1] = tiles[-1], tiles[-2]
+    tiles.insert(blank, 0)
+    return pack_cells(tiles), blank
+
+
+def state_rank(state):
+    return rank_state(state.packed, state.blank)
+
+
+class StateBitmap:
+    __slots__ = ("bits",)
+
+    def __init__(self, size=STATE_SPACE_SIZE):
+        self.bits = bytearray((size + 7) >> 3)
+
+    def __contains__(self, rank):
+        return (self.bits[rank >> 3] >> (rank & 7)) & 1 == 1
+
+    def add(self, rank):
+        self.bits[rank >> 3] |= 1 << (rank & 7)
+
+    def discard(self, rank):
+        self.bits[rank >> 3] &= ~(1 << (rank & 7)) & 0xFF
+
+
+class BucketQueue:
+    # Dial's bucket queue for small non-negative integer priorities (unit
+    # step costs keep f well under a hundred). Each bucket is a LIFO stack,
+    # so ties on f go to the latest push, i.e. the node with the larger g.
+    __slots__ = ("buckets", "minimum", "size")
+
+    def __init__(self):
+        self.buckets = []
+        self.minimum = 0
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def push(self, priority, item):
+        buckets = self.buckets
+        while len(buckets) <= priority:
+            buckets.append([])
+        buckets[priority].append(item)
+        if priority < self.minimum:
+            self.minimum = priority
+        self.size += 1
+
+    def pop(self):
+        buckets = self.buckets
+        while not buckets[self.minimum]:
+            self.minimum += 1
+        self.size -= 1
+        return buckets[self.minimum].pop()
+
+
+def new_cost_table(typecode="H", size=STATE_SPACE_SIZE):
+    # Every slot starts at the largest value the typecode holds, so an
+    # unseen state compares greater than any real cost.
+    unseen = (1 << (8 * array(typecode).itemsize)) - 1
+    return array(typecode, [unseen]) * size
+
+
+UNREACHED = 0xFF
+STATE_TABLE_CACHE = {}
+DISTANCE_TABLE_CACHE = {}
+PATTERN_TABLE_CACHE = {}
+
+# Distance file layout: a fixed little-endian header followed by one nibble
+# per rank (even ranks in the low nibble) holding distance mod 16.
+DISTANCE_FILE_MAGIC = b"8PZD"
+DISTANCE_FILE_VERSION = 1
+DISTANCE_FILE_HEADER = struct.Struct("<4sHBB9sII")
+DISTANCE_TABLE_DIR = os.environ.get(
+    "PUZZLE_TABLE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "tables"))
+
+
+def rank_cells(cells):
+    # Vectorised rank_state over an (N, 9) array of cell values.
+    cells = np.asarray(cells, dtype=np.uint8)
+    blanks = np.argmin(cells, axis=1).astype(np.int64)
+    tiles = cells[cells != 0].reshape(len(cells), TILE_COUNT).astype(np.int64)
+    later_smaller = (tiles[:, None, :] < tiles[:, :, None]) & np.triu(
+        np.ones((TILE_COUNT, TILE_COUNT), dtype=bool), 1)
+    weights = np.array(FACTORIALS[TILE_COUNT - 1::-1], dtype=np.int64)
+    codes = later_smaller.sum(axis=2) @ weights
+    return blanks * HALF_TILE_PERMUTATIONS + (codes >> 1)
+
+
+def get_state_tables(parity):
+    # (cells, successors) for every state of one parity class, indexed by
+    # rank; successors[r, a] is the rank reached by ACTIONS[a], or -1.
+    if parity in STATE_TABLE_CACHE:
+        return STATE_TABLE_CACHE[parity]
+    start_time = time.time()
+    perms = np.array(list(itertools.permutations(range(CELL_COUNT))), dtype=np.uint8)
+    tiles = perms[perms != 0].reshape(len(perms), TILE_COUNT).astype(np.int16)
+    inversions = ((tiles[:, None, :] < tiles[:, :, None]) & np.triu(
+        np.ones((TILE_COUNT, TILE_COUNT), dtype=bool), 1)).sum(axis=(1, 2))
+    perms = perms[inversions % 2 == parity]
+    cells = np.empty_like(perms)
+    cells[rank_cells(perms)] = perms
+    blanks = np.argmin(cells, axis=1)
+    rows = np.arange(len(cells))
+    successors = np.full((len(cells), len(ACTIONS)), -1, dtype=np.int32)
+    for a, action in enumerate(ACTIONS):
+        targets = np.array([ACTION_TARGETS[blank].get(action, -1)
+                            for blank in range(CELL_COUNT)])[blanks]
+        legal = rows[targets >= 0]
+        moved = cells[legal].copy()
+        moved[np.arange(len(legal)), blanks[legal]] = moved[np.arange(len(legal)), targets[legal]]
+        moved[np.arange(len(legal)), targets[legal]] = 0
+        successors[legal, a] = rank_cells(moved)
+    STATE_TABLE_CACHE[parity] = (cells, successors)
+    logging.debug(
+        f"Built state tables for parity {parity} in {time.time() - start_time:.3f} seconds")
+    return cells, successors
+
+
+def build_distance_table(goal):
+    # Retrograde BFS from the goal; moves are reversible, so the distance
+    # from the goal is also the optimal distance to it.
+    goal_packed = pack_board(goal)
+    _, successors = get_state_tables(tile_parity(goal_packed))
+    distances = np.full(STATE_SPACE_SIZE, UNREACHED, dtype=np.uint8)
+    frontier = np.array([rank_state(goal_packed, packed_blank(goal_packed))])
+    distances[frontier] = 0
+    depth = 0
+    while len(frontier):
+        depth += 1
+        neighbours = successors[frontier].ravel()
+        neighbours = neighbours[neighbours >= 0]
+        frontier = np.unique(neighbours[distances[neighbours] == UNREACHED])
+        distances[frontier] = depth
+    return distances
+
+
+class DistanceTable:
+    # Read-only view over nibble-packed distances; indexing returns the
+    # distance mod 16. Neighbouring states always differ by exactly one
+    # move, so that is enough to descend to the goal.
+    __slots__ = ("goal_packed", "data", "offset")
+
+    def __init__(self, goal_packed, data, offset=0):
+        self.goal_packed = goal_packed
+        self.data = data
+        self.offset = offset
+
+    def __getitem__(self, rank):
+        return (self.data[self.offset + (rank >> 1)] >> ((rank & 1) << 2)) & 0xF
+
+
+def pack_distances(distances):
+    distances = np.asarray(distances, dtype=np.uint8) & 0xF
+    return ((distances[0::2]) | (distances[1::2] << 4)).tobytes()
+
+
+def distance_file_path(goal, directory=None):
+    name = "".join(str(num) for num in packed_cells(pack_board(goal)))
+    return os.path.join(directory or DISTANCE_TABLE_DIR, f"distances_{name}.bin")
+
+
+def save_distance_table(goal, path=None):
+    goal_packed = pack_board(goal)
+    path = path or distance_file_path(goal_packed)
+    distances = build_distance_table(goal_packed)
+    payload = pack_distances(distances)
+    header = DISTANCE_FILE_HEADER.pack(
+        DISTANCE_FILE_MAGIC, DISTANCE_FILE_VERSION, CELL_COUNT, int(distances.max()),
+        bytes(packed_cells(goal_packed)), STATE_SPACE_SIZE, zlib.crc32(payload))
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "wb") as f:
+        f.write(header)
+        f.write(payload)
+    os.replace(temp_path, path)
+    logging.debug(f"Saved distance table for {unpack_board(goal_packed)} to {path}")
+    return path
+
+
+def load_distance_table(path, goal=None):
+    with open(path, "rb") as f:
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        magic, version, cell_count, _, goal_cells_bytes, size, checksum = \
+            DISTANCE_FILE_HEADER.unpack_from(data)
+    except struct.error:
+        data.close()
+        raise ValueError(f"Distance table {path} is truncated")
+    goal_packed = pack_cells(goal_cells_bytes)
+    payload = data[DISTANCE_FILE_HEADER.size:]
+    problem = None
+    if magic != DISTANCE_FILE_MAGIC or version != DISTANCE_FILE_VERSION:
+        problem = f"unsupported format {magic!r} v{version}"
+    elif cell_count != CELL_COUNT or size != STATE_SPACE_SIZE or len(payload) != size // 2:
+        problem = "size mismatch"
+    elif goal is not None and goal_packed != pack_board(goal):
+        problem = "goal mismatch"
+    elif zlib.crc32(payload) != checksum:
+        problem = "checksum mismatch"
+    if problem:
+        data.close()
+        raise ValueError(f"Invalid distance table {path}: {problem}")
+    return DistanceTable(goal_packed, data, DISTANCE_FILE_HEADER.size)
+
+
+def get_distance_table(goal):
+    goal_packed = pack_board(goal)
+    if goal_packed in DISTANCE_TABLE_CACHE:
+        return DISTANCE_TABLE_CACHE[goal_packed]
+    path = distance_file_path(goal_packed)
+    table = None
+    if os.path.exists(path):
+        try:
+            table = load_distance_table(path, goal_packed)
+        except (OSError, ValueError) as e:
+            logging.warning(f"Rebuilding distance table: {str(e)}")
+    if table is None:
+        try:
+            table = load_distance_table(save_distance_table(goal_packed, path), goal_packed)
+        except OSError as e:
+            logging.warning(
+                f"Could not write distance table {path}, keeping it in memory: {str(e)}")
+            table = DistanceTable(goal_packed, pack_distances(
+                build_distance_table(goal_packed)))
+    DISTANCE_TABLE_CACHE[goal_packed] = table
+    return table
+
+
+def build_pattern_table(goal, tiles):
+    # Additive pattern database for one tile group: 0-1 BFS over abstract
+    # states (positions of `tiles` plus the blank) where only moves of the
+    # group's own tiles cost 1, then the minimum over blank positions.
+    # Indexed by sum(cell_of(tiles[k]) * CELL_COUNT ** k).
+    start_time = time.time()
+    goal_cells = packed_cells(pack_board(goal))
+    span = CELL_COUNT ** len(tiles)
+    powers = [CELL_COUNT ** k for k in range(len(tiles))]
+    start = sum(goal_cells.index(tile) * power for tile, power in zip(tiles, powers))
+    start += goal_cells.index(0) * span
+    distances = [UNREACHED] * (span * CELL_COUNT)
+    distances[start] = 0
+    frontier = deque([start])
+    while frontier:
+        state = frontier.popleft()
+        distance = distances[state]
+        blank, positions = divmod(state, span)
+        cells = [(positions // power) % CELL_COUNT for power in powers]
+        for target in MOVE_TARGETS[blank]:
+            base = state + (target - blank) * span
+            if target in cells:
+                power = powers[cells.index(target)]
+                new_state, cost = base + (blank - target) * power, 1
+            else:
+                new_state, cost = base, 0
+            if distance + cost < distances[new_state]:
+                distances[new_state] = distance + cost
+                if cost:
+                    frontier.append(new_state)
+                else:
+                    frontier.appendleft(new_state)
+    table = np.array(distances, dtype=np.uint8).reshape(CELL_COUNT, span).min(axis=0)
+    logging.debug(
+        f"Built pattern table for tiles {tiles} in {time.time() - start_time:.2f}s")
+    return table
+
+
+def pattern_table_path(goal, tiles, directory=None):
+    name = "".join(str(num) for num in packed_cells(pack_board(goal)))
+    group = "".join(str(tile) for tile in tiles)
+    return os.path.join(directory or DISTANCE_TABLE_DIR, f"pattern_{name}_{group}.npy")
+
+
+def get_pattern_table(goal, tiles):
+    goal_packed = pack_board(goal)
+    key = (goal_packed, tuple(tiles))
+    if key in PATTERN_TABLE_CACHE:
+        return PATTERN_TABLE_CACHE[key]
+    path = pattern_table_path(goal_packed, tiles)
+    table = None
+    if os.path.exists(path):
+        try:
+            table = np.load(path, mmap_mode="r")
+            if table.dtype != np.uint8 or table.shape != (CELL_COUNT ** len(tiles),):
+                raise ValueError(f"unexpected shape {table.shape} or dtype {table.dtype}")
+        except (OSError, ValueError) as e:
+            logging.warning(f"Rebuilding pattern table {path}: {str(e)}")
+            table = None
+    if table is None:
+        table = build_pattern_table(goal_packed, tiles)
+        try:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            temp_path = f"{path}.{os.getpid()}.tmp"
+            with open(temp_path, "wb") as f:
+                np.save(f, table)
+            os.replace(temp_path, path)
+        except OSError as e:
+            logging.warning(
+                f"Could not write pattern table {path}, keeping it in memory: {str(e)}")
+    PATTERN_TABLE_CACHE[key] = table
+    return table
+
+
+def oracle_solve(start_state, goal_state):
+    start_time = time.time()
+    if not is_solvable(start_state, goal_state):
+        logging.info("Puzzle is not solvable")
+        return None, time.time() - start_time, []
+    goal_packed = pack_board(goal_state)
+    distances = get_distance_table(goal_packed)
+    current = PuzzleState(start_state, strategy="Oracle",
+                          context=get_heuristic_context(goal_packed))
+    distance = distances[state_rank(current)]
+    while current.packed != goal_packed:
+        distance = (distance - 1) & 0xF
+        for new_packed, new_blank in get_successors(current.packed, current.blank):
+            if distances[rank_state(new_packed, new_blank)] == distance:
+                current = PuzzleState(
+                    new_packed, current.moves + 1, current, "Oracle", new_blank)
+                break
+        else:
+            logging.error("Oracle: No successor with a smaller distance")
+            return None, time.time() - start_time, []
+    logging.debug(
+        f"Oracle found solution in {current.moves} moves")
+    return current, time.time() - start_time, []
+
+
+def chain_states(boards, strategy, context):
+    # Turn a list of boards, start first, into the linked PuzzleStates that
+    # get_solution_path walks back from the last one.
+    current = PuzzleState(boards[0], strategy=strategy, context=context)
+    for board in boards[1:]:
+        current = PuzzleState(board, current.moves + 1, current, strategy)
+    return current
+
+
+def bounded_path_search(geometry, start_packed, goal_packed, limit, context=None, failed=None):
+    # One depth-first probe that never lets moves + h exceed `limit`, where h
+    # comes from `context` (0 without one). The current path is the only
+    # structure it keeps: boards are pushed going down and popped on
+    # backtrack, cycles are checked against the path alone and the move that
+    # undoes the previous one is skipped. `failed`, when given, maps a board
+    # to the largest budget (limit - moves) it already failed with; it is
+    # read and extended here so callers can share it across limits. That
+    # stays exact because a larger limit is only tried once every smaller one
+    # failed. Returns the board path or None, the smallest f that exceeded
+    # `limit`, and the number of boards generated.
+    bits, mask, count = geometry.cell_bits, geometry.cell_mask, geometry.cell_count
+    move_targets = geometry.move_targets
+    if context is None:
+        move_delta = evaluate = None
+        h = 0
+    else:
+        move_delta = context.move_delta if context.incremental else None
+        evaluate = context.evaluate
+        h = evaluate(start_packed)
+    if h > limit:
+        return None, h, 0
+    if start_packed == goal_packed:
+        return [start_packed], limit, 0
+    boards = [start_packed]
+    blanks = [geometry.blank(start_packed)]
+    h_values = [h]
+    cursor = [0]
+    on_path = {start_packed}
+    next_limit = float('inf')
+    generated = 0
+    while cursor:
+        packed, blank = boards[-1], blanks[-1]
+        targets = move_targets[blank]
+        index = cursor[-1]
+        if index == len(targets):
+            cursor.pop()
+            boards.pop()
+            blanks.pop()
+            h_values.pop()
+            on_path.discard(packed)
+            if failed is not None:
+                budget = limit - len(boards)
+                if failed.get(packed, -1) < budget:
+                    failed[packed] = budget
+            continue
+        cursor[-1] = index + 1
+        target = targets[index]
+        if len(blanks) > 1 and target == blanks[-2]:
+            continue
+        shift = target * bits
+        tile = (packed >> shift) & mask
+        child = packed - (tile << shift) + (tile << blank * bits)
+        generated += 1
+        if move_delta is not None:
+            h = h_values[-1] + move_delta[(tile * count + target) * count + blank]
+        elif evaluate is not None:
+            h = evaluate(child)
+        f = len(boards) + h
+        if f > limit:
+            if f < next_limit:
+                next_limit = f
+            continue
+        if child == goal_packed:
+            return boards + [child], limit, generated
+        budget = limit - len(boards)
+        if budget == 0 or child in on_path:
+            continue
+        if failed is not None and failed.get(child, -1) >= budget:
+            continue
+        boards.append(child)
+        blanks.append(target)
+        h_values.append(h)
+        cursor.append(0)
+        on_path.add(child)
+    return None, next_limit, generated
+
+
+def bidirectional_bfs_solve(start_state, goal_state):
+    # Layered BFS from both ends, always growing the smaller frontier. Each
+    # side records, per state_key, the cell its blank came from (the state's
+    # own blank marks the root), so a half-path is rebuilt by undoing moves.
+    start_time = time.time()
+    if not is_solvable(start_state, goal_state):
+        logging.info("Puzzle is not solvable")
+        return None, time.time() - start_time, []
+    geometry = board_geometry(goal_state)
+    state_key = geometry.state_key
+    start_packed, goal_packed = pack_board(start_state), pack_board(goal_state)
+    start_blank, goal_blank = geometry.blank(start_packed), geometry.blank(goal_packed)
+    forward, backward = geometry.cost_table("B"), geometry.cost_table("B")
+    unseen = forward[state_key(start_packed, start_blank)]
+    forward[state_key(start_packed, start_blank)] = start_blank
+    backward[state_key(goal_packed, goal_blank)] = goal_blank
+    forward_frontier = [(start_packed, start_blank)]
+    backward_frontier = [(goal_packed, goal_blank)]
+    meeting = (start_packed, start_blank) if start_packed == goal_packed else None
+    expanded = 0
+
+    while meeting is None and forward_frontier and backward_frontier:
+        grow_forward = len(forward_frontier) <= len(backward_frontier)
+        frontier = forward_frontier if grow_forward else backward_frontier
+        seen, other = (forward, backward) if grow_forward else (backward, forward)
+        next_frontier = []
+        for packed, blank in frontier:
+            expanded += 1
+            for new_packed, new_blank in geometry.successors(packed, blank):
+                key = state_key(new_packed, new_blank)
+                if seen[key] != unseen:
+                    continue
+                seen[key] = blank
+                if other[key] != unseen:
+                    meeting = (new_packed, new_blank)
+                    break
+                next_frontier.append((new_packed, new_blank))
+            if meeting:
+                break
+        if grow_forward:
+            forward_frontier = next_frontier
+        else:
+            backward_frontier = next_frontier
+
+    if meeting is None:
+        logging.debug("Bidirectional BFS failed to find solution")
+        return None, time.time() - start_time, []
+
+    def half_path(packed, blank, parents):
+        path = [packed]
+        while parents[state_key(packed, blank)] != blank:
+            parent_blank = parents[state_key(packed, blank)]
+            packed, blank = geometry.move(packed, blank, parent_blank), parent_blank
+            path.append(packed)
+        return path
+
+    boards = half_path(*meeting, forward)[::-1] + half_path(*meeting, backward)[1:]
+    context = get_heuristic_context(goal_packed, geometry=geometry)
+    current = chain_states(boards, "Bidirectional BFS", context)
+    logging.debug(
+        f"Bidirectional BFS found solution in {current.moves} moves, expanded {expanded} states")
+    return current, time.time() - start_time, []
+
+
+def iterative_deepening_solve(start_state, goal_state, max_depth=100, transposition=True):
+    # bounded_path_search with limits 1, 2, ... and no heuristic. With
+    # `transposition` the failed-board table is shared by every iteration, so
+    # repeated shallow probes skip boards already known to be dead ends.
+    start_time = time.time()
+    if not is_solvable(start_state, goal_state):
+        logging.info("Puzzle is not solvable")
+        return None, time.time() - start_time, []
+    geometry = board_geometry(goal_state)
+    start_packed, goal_packed = pack_board(start_state), pack_board(goal_state)
+    failed = {} if transposition else None
+    path = [start_packed] if start_packed == goal_packed else None
+
+    for depth_limit in range(1, max_depth + 1):
+        if path is not None:
+            break
+        path, _, generated = bounded_path_search(
+            geometry, start_packed, goal_packed, depth_limit, failed=failed)
+        logging.debug(f"IDS depth {depth_limit}: {generated} nodes generated"
+                      + (f", {len(failed)} failed boards" if transposition else ""))
+
+    if path is None:
+        logging.debug("IDS failed to find solution")
+        return None, time.time() - start_time, []
+    context = get_heuristic_context(goal_packed, geometry=geometry)
+    current = chain_states(path, "IDS", context)
+    logging.debug(f"IDS found solution in {current.moves} moves at depth {current.moves}")
+    return current, time.time() - start_time, []
+
+
 def ac3_solve(start_state, goal_state, max_depth=100):
     start_time = time.time()
     if isinstance(start_state, tuple):
@@ -178,6 +1192,8 @@ def ac3_solve(start_state, goal_state, max_depth=100):
     if not is_solvable(start_state, goal_state):
         logging.info("Puzzle is not solvable")
         return None, time.time() - start_time, []
+    goal_packed = pack_board(goal_state)
+    context = get_heuristic_context(goal_packed)
 
     def setup_csp(start_board, max_depth):
         csp = {
@@ -187,39 +1203,32 @@ def ac3_solve(start_state, goal_state, max_depth=100):
             'constraints': lambda arc, values: is_valid_move(values[0], values[1])
         }
         csp['neighbors'][max_depth-1] = []
-        csp['domains'][0] = [copy.deepcopy(start_board)]
-        queue = deque([(PuzzleState(start_board, strategy="AC3"), 0)])
+        csp['domains'][0] = [pack_board(start_board)]
+        queue = deque([(PuzzleState(start_board, strategy="AC3", context=context), 0)])
         visited = set()
         max_states_per_depth = 10000
         logging.debug(f"Starting CSP setup with start_board: {start_board}")
 
         while queue:
             state, depth = queue.popleft()
-            board_hash = get_hash(state.board)
-            if board_hash in visited:
+            if state.packed in visited:
                 continue
-            visited.add(board_hash)
+            visited.add(state.packed)
             if depth + 1 >= max_depth:
                 continue
-            possible_moves = get_possible_moves(state.board)
-            move_states = [
-                PuzzleState(new_board, state.moves + 1, state, "AC3")
-                for new_board in possible_moves
-                if is_valid_move(state.board, new_board)
-            ]
+            move_states = state.successors()
             move_states.sort(key=lambda s: s.h)
             for new_state in move_states[:max_states_per_depth]:
-                new_hash = get_hash(new_state.board)
-                if new_hash not in visited:
-                    csp['domains'][depth + 1].append(new_state.board)
+                if new_state.packed not in visited:
+                    csp['domains'][depth + 1].append(new_state.packed)
                     queue.append((new_state, depth + 1))
-            if any(new_state.board == goal_state for new_state in move_states):
+            if any(new_state.packed == goal_packed for new_state in move_states):
                 csp['domains'][min(depth + 1, max_depth - 1)
-                               ].append(goal_state)
+                               ].append(goal_packed)
                 logging.debug(f"Goal state found at depth {depth + 1}")
         for i in range(max_depth // 2, max_depth):
-            if goal_state not in csp['domains'][i]:
-                csp['domains'][i].append(copy.deepcopy(goal_state))
+            if goal_packed not in csp['domains'][i]:
+                csp['domains'][i].append(goal_packed)
                 logging.debug(f"Added goal state to domain[{i}]")
             for _ in range(5):
                 intermediate_board = generate_random_solvable_state(
@@ -274,7 +1283,7 @@ def ac3_solve(start_state, goal_state, max_depth=100):
         return True
 
     def backtrack(csp, assignment, depth):
-        if depth > 0 and assignment[-1].board == goal_state:
+        if depth > 0 and assignment[-1].packed == goal_packed:
             logging.debug(
                 f"Backtrack: Goal reached at depth {depth}, moves {assignment[-1].moves}")
             return assignment[-1]
@@ -283,14 +1292,15 @@ def ac3_solve(start_state, goal_state, max_depth=100):
                 f"Backtrack: Failed at depth {depth}, domain empty={not csp['domains'][depth]}")
             return None
         sorted_boards = sorted(
-            csp['domains'][depth], key=lambda b: manhattan_distance(b, goal_state))
+            csp['domains'][depth], key=context.manhattan)
         for board in sorted_boards:
-            if depth == 0 or is_valid_move(assignment[-1].board, board):
+            if depth == 0 or is_valid_move(assignment[-1].packed, board):
                 new_state = PuzzleState(
                     board,
                     assignment[-1].moves + 1 if assignment else 0,
                     assignment[-1] if assignment else None,
-                    strategy="AC3"
+                    strategy="AC3",
+                    context=context
                 )
                 logging.debug(
                     f"Backtrack: Depth {depth}, trying board: {board}")
@@ -302,7 +1312,7 @@ def ac3_solve(start_state, goal_state, max_depth=100):
 
     try:
         csp = setup_csp(start_state, max_depth)
-        goal_present = any(goal_state in csp['domains'][i]
+        goal_present = any(goal_packed in csp['domains'][i]
                            for i in range(max_depth))
         if not goal_present:
             logging.error(
@@ -315,7 +1325,7 @@ def ac3_solve(start_state, goal_state, max_depth=100):
         if not all(csp['domains'][i] for i in range(max_depth)):
             logging.error("AC3: One or more domains empty after propagation")
             raise ValueError("Empty domains after AC3")
-        start_state_obj = PuzzleState(start_state, strategy="AC3")
+        start_state_obj = PuzzleState(start_state, strategy="AC3", context=context)
         solution = backtrack(csp, [start_state_obj], 0)
         total_time = time.time() - start_time
         if solution:
@@ -333,37 +1343,31 @@ def ac3_solve(start_state, goal_state, max_depth=100):
         return solution, total_time, history
 
 
-def backtracking_solve(start_state, goal_state, max_depth=50):
+def backtracking_solve(start_state, goal_state, max_depth=50, memoize=True):
+    # Backtracking along a single shared path (bounded_path_search), deepened
+    # one move at a time up to max_depth. With `memoize`, boards that failed
+    # with a given remaining depth are not explored again with less.
     if not is_solvable(start_state, goal_state):
         logging.info("Puzzle is not solvable")
         return None
 
-    def backtrack(state, depth, visited):
-        if state.board == goal_state:
-            return state
-        if depth >= max_depth:
-            return None
-
-        state_hash = get_hash(state.board)
-        if state_hash in visited:
-            return None
-        visited.add(state_hash)
-
-        for new_board in get_possible_moves(state.board):
-            if is_valid_move(state.board, new_board):
-                new_state = PuzzleState(
-                    new_board, state.moves + 1, state, "Backtracking")
-                result = backtrack(new_state, depth + 1, visited.copy())
-                if result:
-                    return result
-        return None
+    geometry = board_geometry(goal_state)
+    start_packed, goal_packed = pack_board(start_state), pack_board(goal_state)
+    failed = {} if memoize else None
+    path = None
+    for depth_limit in range(max_depth + 1):
+        path, _, generated = bounded_path_search(
+            geometry, start_packed, goal_packed, depth_limit, failed=failed)
+        logging.debug(f"Backtracking depth {depth_limit}: {generated} nodes generated")
+        if path is not None:
+            break
 
-    start = PuzzleState(start_state, strategy="Backtracking")
-    result = backtrack(start, 0, set())
-    if result:
-        logging.debug(f"Backtracking found solution in {result.moves} moves")
-    else:
+    if path is None:
         logging.debug("Backtracking failed to find solution")
+        return None
+    context = get_heuristic_context(goal_packed, geometry=geometry)
+    result = chain_states(path, "Backtracking", context)
+    logging.debug(f"Backtracking found solution in {result.moves} moves")
     return result
 
 
@@ -379,6 +1383,9 @@ def generate_and_test_solve(start_state, goal_state, max_steps=1000, max_restart
         start_state = [list(row) for row in start_state]
 
     start_time = time.time()
+    start_packed = pack_board(start_state)
+    goal_packed = pack_board(goal_state)
+    context = get_heuristic_context(goal_packed)
     best_state = None
     best_heuristic = float('inf')
     solution_path = []
@@ -387,24 +1394,24 @@ def generate_and_test_solve(start_state, goal_state, max_steps=1000, max_restart
         # Use the original start_state for the first restart
         if restart == 0:
             current_state = PuzzleState(
-                start_state, strategy="Generate and Test")
+                start_state, strategy="Generate and Test", context=context)
             logging.debug(
                 f"Generate and Test: Using original start_state: {start_state}")
         else:
             # Generate a new solvable state for subsequent restarts
             current_state = PuzzleState(
-                generate_random_solvable_state(goal_state), strategy="Generate and Test")
+                generate_random_solvable_state(goal_state), strategy="Generate and Test", context=context)
             logging.debug(
                 f"Generate and Test: Restart {restart + 1}, new start_state: {current_state.board}")
 
-        visited = set([get_hash(current_state.board)])
+        visited = set([current_state.packed])
         steps = 0
-        local_path = [(current_state.board, current_state.moves)]
+        local_path = [(current_state.packed, current_state.moves)]
 
         while steps < max_steps:
-            if current_state.board == goal_state:
+            if current_state.packed == goal_packed:
                 # Validate path for the first restart
-                if restart == 0 and local_path[0][0] == start_state:
+                if restart == 0 and local_path[0][0] == start_packed:
                     logging.debug(
                         f"Generate and Test: Solution found in {current_state.moves} moves, path length: {len(local_path)}")
                     return current_state, time.time() - start_time, []
@@ -414,8 +1421,7 @@ def generate_and_test_solve(start_state, goal_state, max_steps=1000, max_restart
                     break
 
             # Update best state
-            current_heuristic = manhattan_distance(
-                current_state.board, goal_state)
+            current_heuristic = current_state.h
             if current_heuristic < best_heuristic:
                 best_state = current_state
                 best_heuristic = current_heuristic
@@ -424,29 +1430,28 @@ def generate_and_test_solve(start_state, goal_state, max_steps=1000, max_restart
                     f"Generate and Test: New best heuristic {best_heuristic} at state {current_state.board}")
 
             # Generate a new state
-            possible_moves = get_possible_moves(current_state.board)
+            possible_moves = context.successors(
+                current_state.packed, current_state.blank, current_state.h)
             if not possible_moves:
                 logging.debug(
                     f"Generate and Test: No valid moves at state {current_state.board}")
                 break
 
-            heuristics = [manhattan_distance(
-                new_board, goal_state) for new_board in possible_moves]
-            weights = [1.0 / (h + 1) for h in heuristics]
+            weights = [1.0 / (h + 1) for _, _, h in possible_moves]
             total = sum(weights)
             probabilities = [w / total for w in weights]
-            new_board = random.choices(possible_moves, probabilities, k=1)[0]
+            new_board, new_blank, new_h = random.choices(possible_moves, probabilities, k=1)[0]
 
-            new_state_hash = get_hash(new_board)
-            if new_state_hash not in visited:
-                visited.add(new_state_hash)
+            if new_board not in visited:
+                visited.add(new_board)
                 current_state = PuzzleState(
-                    new_board, current_state.moves + 1, current_state, strategy="Generate and Test")
-                local_path.append((current_state.board, current_state.moves))
+                    new_board, current_state.moves + 1, current_state, strategy="Generate and Test",
+                    blank=new_blank, h=new_h)
+                local_path.append((current_state.packed, current_state.moves))
                 steps += 1
             else:
                 logging.debug(
-                    f"Generate and Test: State {new_board} already visited")
+                    f"Generate and Test: State {unpack_board(new_board)} already visited")
                 break
 
             logging.debug(
@@ -455,17 +1460,13 @@ def generate_and_test_solve(start_state, goal_state, max_steps=1000, max_restart
         # Try BFS from the best state, ensuring input is a list
         if best_state and best_heuristic < float('inf') and restart == 0:
             best_board = best_state.board
-            if isinstance(best_board, tuple):
-                logging.warning(
-                    "Best state board is tuple; converting to list")
-                best_board = [list(row) for row in best_board]
             logging.debug(
                 f"Generate and Test: Attempting BFS from best state: {best_board}")
             valid_solution, bfs_time, history = solve_puzzle(
                 best_board, goal_state, "BFS")
             if valid_solution and isinstance(valid_solution, PuzzleState):
                 reconstructed_path = get_solution_path(valid_solution)
-                if reconstructed_path and reconstructed_path[0][0] == start_state:
+                if reconstructed_path and pack_board(reconstructed_path[0][0]) == start_packed:
                     logging.debug(
                         f"Generate and Test: Reconstructed solution with {valid_solution.moves} moves")
                     return valid_solution, time.time() - start_time + bfs_time, []
@@ -495,82 +1496,98 @@ def generate_and_test_solve(start_state, goal_state, max_steps=1000, max_restart
 
 
 def genetic_algorithm_solve(start, goal, population_size=100, max_generations=1000, mutation_rate=0.1):
-    def fitness_fn(individual):
-        return manhattan_distance(individual.board, goal)
-
-    def random_selection(population, fitness_fn):
-        total_fitness = sum(1.0 / (fitness_fn(ind) + 1) for ind in population)
-        if total_fitness == 0:
-            return random.choice(population)
-        weights = [(1.0 / (fitness_fn(ind) + 1)) /
-                   total_fitness for ind in population]
-        return random.choices(population, weights=weights, k=1)[0]
-
-    def reproduce(x, y):
-        n = 9  # Length of flattened board
-        c = random.randint(0, n - 1)
-        flat_x = [num for row in x.board for num in row]
-        flat_y = [num for row in y.board for num in row]
-        child_flat = flat_x[:c] + flat_y[c:]
-        # Ensure child has all numbers 0-8 exactly once
-        used = set(child_flat[:c])
-        remaining = [num for num in flat_y if num not in used]
-        child_flat[c:] = remaining[:n - c]
-        # Convert back to 3x3 board
-        child_board = [[child_flat[i * 3 + j]
-                        for j in range(3)] for i in range(3)]
-        return PuzzleState(child_board, x.moves + 1, x, strategy="Genetic Algorithm")
-
-    def mutate(individual, mutation_rate):
-        if random.random() < mutation_rate:
-            moves = get_possible_moves(individual.board)
-            if moves:
-                new_board = random.choice(moves)
-                return PuzzleState(new_board, individual.moves + 1, individual, strategy="Genetic Algorithm")
-        return individual
-
+    # The population is a (P, n) uint8 array of cell values. Fitness is
+    # 1 / (h + 1) with h the Manhattan distance of every row in one pass,
+    # parents are drawn by roulette (searchsorted into the cumulative
+    # weights), and crossover and mutation run on the whole generation at
+    # once. Every generation and the first parent of each child are kept, so
+    # the winner's lineage becomes a PuzzleState chain only at the end.
     if not is_solvable(start, goal):
         logging.info("Puzzle is not solvable")
         return None, time.time(), []
 
     start_time = time.time()
-    # Initialize population, ensuring start_state is included
-    # Include original start state
-    population = [PuzzleState(start, strategy="Genetic Algorithm")]
-    for _ in range(population_size - 1):  # Generate remaining population
-        current_board = copy.deepcopy(start)
-        current_state = PuzzleState(
-            current_board, strategy="Genetic Algorithm")
-        for _ in range(random.randint(5, 15)):  # Random moves to diversify
-            moves = get_possible_moves(current_state.board)
-            if moves:
-                new_board = random.choice(moves)
-                current_state = PuzzleState(
-                    new_board, current_state.moves + 1, current_state, strategy="Genetic Algorithm")
-        population.append(current_state)
+    goal_packed = pack_board(goal)
+    context = get_heuristic_context(goal)
+    geometry = context.geometry
+    n = geometry.cell_count
+    rng = np.random.default_rng(random.getrandbits(64))
+    columns = np.arange(n)
+    move_targets = np.zeros((n, len(ACTIONS)), dtype=np.intp)
+    move_counts = np.zeros(n, dtype=np.intp)
+    for blank, targets in enumerate(geometry.move_targets):
+        move_targets[blank, :len(targets)] = targets
+        move_counts[blank] = len(targets)
+    goal_cells = np.array(geometry.cells(goal_packed), dtype=np.uint8)
+
+    def move_blanks(population, selected):
+        # Slide the blank of every selected row into a random neighbour.
+        picked = np.flatnonzero(selected)
+        blanks = np.argmin(population[picked], axis=1)
+        choices = (rng.random(len(picked)) * move_counts[blanks]).astype(np.intp)
+        targets = move_targets[blanks, choices]
+        population[picked, blanks] = population[picked, targets]
+        population[picked, targets] = 0
+
+    def random_selection(weights, count):
+        totals = np.cumsum(weights)
+        picks = np.searchsorted(totals, rng.random(count) * totals[-1], side="right")
+        return np.minimum(picks, len(weights) - 1)
+
+    def reproduce(x, y):
+        # x up to a random cut, then the tiles x has not used in y's order.
+        cuts = rng.integers(0, n, len(x))[:, None]
+        head = columns < cuts
+        used = np.zeros(x.shape, dtype=bool)
+        np.put_along_axis(used, x.astype(np.intp), head, axis=1)
+        order = np.argsort(np.take_along_axis(used, y.astype(np.intp), axis=1),
+                           axis=1, kind="stable")
+        remaining = np.take_along_axis(y, order, axis=1)
+        tail = np.take_along_axis(remaining, np.maximum(columns - cuts, 0), axis=1)
+        return np.where(head, x, tail)
+
+    def lineage(index):
+        boards = []
+        for generation in range(len(parents), 0, -1):
+            boards.append(generations[generation][index])
+            index = parents[generation - 1][index]
+        boards += [walks[step][index] for step in range(walk_lengths[index], -1, -1)]
+        return chain_states([geometry.pack_cells(row.tolist()) for row in reversed(boards)],
+                            "Genetic Algorithm", context)
+
+    # Individual 0 is the start state, the rest random walks of 5-15 moves.
+    population = np.tile(np.array(geometry.cells(pack_board(start)), dtype=np.uint8),
+                         (population_size, 1))
+    walk_lengths = rng.integers(5, 16, population_size)
+    walk_lengths[0] = 0
+    walks = [population.copy()]
+    for step in range(walk_lengths.max()):
+        move_blanks(population, walk_lengths > step)
+        walks.append(population.copy())
+    generations, parents = [population], []
+    h = context.manhattan_rows(population)
 
     for generation in range(max_generations):
-        new_population = []
-        for _ in range(population_size):
-            x = random_selection(population, fitness_fn)
-            y = random_selection(population, fitness_fn)
-            child = reproduce(x, y)
-            child = mutate(child, mutation_rate)
-            new_population.append(child)
-
-        population = new_population
-        # Find the best individual
-        best_individual = min(population, key=fitness_fn)
-        if best_individual.board == goal:
+        picks = random_selection(1.0 / (h + 1), 2 * population_size)
+        x = picks[:population_size]
+        population = reproduce(population[x], population[picks[population_size:]])
+        move_blanks(population, rng.random(population_size) < mutation_rate)
+        generations.append(population)
+        parents.append(x)
+        h = context.manhattan_rows(population)
+
+        solved = np.flatnonzero((population == goal_cells).all(axis=1))
+        if len(solved):
+            best_individual = lineage(solved[0])
             logging.debug(
                 f"Genetic Algorithm found solution in generation {generation}, moves {best_individual.moves}")
             return best_individual, time.time() - start_time, []
 
         logging.debug(
-            f"Genetic Algorithm: Generation {generation}, best fitness {fitness_fn(best_individual)}")
+            f"Genetic Algorithm: Generation {generation}, best fitness {h.min()}")
 
     # Return the best individual if no solution found
-    best_individual = min(population, key=fitness_fn)
+    best_individual = lineage(int(np.argmin(h)))
     logging.debug("Genetic Algorithm did not find exact solution")
     # Try to reconstruct a valid path to the goal using BFS
     valid_solution, solve_time, history = solve_puzzle(
@@ -583,75 +1600,34 @@ def genetic_algorithm_solve(start, goal, population_size=100, max_generations=10
     return best_individual, total_time, []
 
 
-def and_or_graph_search(start_state, goal_state):
+def and_or_graph_search(start_state, goal_state, heuristic=None, memoize=True):
     if not is_solvable(start_state, goal_state):
         logging.info("Puzzle is not solvable")
         return None, time.time(), []
+    goal_packed = pack_board(goal_state)
+    context = get_heuristic_context(goal_packed, heuristic)
 
-    def or_search(state, g, f_limit, visited, start_time, timeout=20):
-        try:
-            if time.time() - start_time > timeout:
-                logging.debug("AND-OR Graph Search timed out")
-                return None, float('inf')
-            if not isinstance(state, PuzzleState):
-                logging.warning(
-                    f"Invalid state type in or_search: {type(state)} - {state}")
-                if isinstance(state, (list, tuple)):
-                    state = PuzzleState(state, strategy="AND-OR Graph Search")
-                    logging.debug(f"Converted to PuzzleState: {state.board}")
-                else:
-                    logging.error(
-                        f"Cannot convert state to PuzzleState: {state}")
-                    return None, float('inf')
-            logging.debug(
-                f"or_search: g={g}, f_limit={f_limit}, state={state.board}")
-            if state.board == goal_state:
-                return state, state.h
-            state_hash = get_hash(state.board)
-            logging.debug(f"State hash: {state_hash}")
-            if state_hash in visited and visited[state_hash] <= g:
-                logging.debug(
-                    f"State already visited with lower g: {visited[state_hash]}")
-                return None, float('inf')
-            visited[state_hash] = g
-            f = g + state.h
-            if f > f_limit:
-                return None, f
-            min_f = float('inf')
-            possible_moves = get_possible_moves(state.board)
-            for new_board in possible_moves:
-                if is_valid_move(state.board, new_board):
-                    new_state = PuzzleState(
-                        new_board, state.moves + 1, state, "AND-OR Graph Search")
-                    if not isinstance(new_state, PuzzleState):
-                        logging.error(
-                            f"Failed to create valid PuzzleState: {type(new_state)} - {new_state}")
-                        continue
-                    result, new_f = or_search(
-                        new_state, g + 1, f_limit, visited.copy(), start_time, timeout)
-                    if result:
-                        return result, f_limit
-                    min_f = min(min_f, new_f)
-            return None, min_f
-        except Exception as e:
-            logging.error(f"Error in or_search: {str(e)}")
-            return None, float('inf')
-
+    # Each OR node tries the moves in turn on one shared path; f-limited
+    # iterations (bounded_path_search with the heuristic) raise the limit to
+    # the smallest f that overflowed. With `memoize`, boards that failed
+    # with a given remaining budget are shared across iterations.
     start_time = time.time()
     logging.debug(
         f"start_state type: {type(start_state)}, value: {start_state}")
     logging.debug(f"goal_state type: {type(goal_state)}, value: {goal_state}")
     try:
-        start = PuzzleState(start_state, strategy="AND-OR Graph Search")
-        f_limit = start.h
-        visited = {}
+        start_packed = pack_board(start_state)
+        f_limit = context.evaluate(start_packed)
+        failed = {} if memoize else None
         max_iterations = 50
 
         for iteration in range(max_iterations):
             logging.debug(
                 f"Starting iteration {iteration + 1}, f_limit={f_limit}")
-            result, new_f = or_search(start, 0, f_limit, visited, start_time)
-            if result:
+            path, new_f, generated = bounded_path_search(
+                context.geometry, start_packed, goal_packed, f_limit, context, failed)
+            if path:
+                result = chain_states(path, "AND-OR Graph Search", context)
                 total_time = time.time() - start_time
                 logging.debug(
                     f"AND-OR Graph Search found solution in {result.moves} moves, {total_time:.3f} seconds")
@@ -660,10 +1636,9 @@ def and_or_graph_search(start_state, goal_state):
                 logging.debug(
                     "AND-OR Graph Search: No solution within f_limit")
                 break
-            f_limit = new_f + 1
+            f_limit = new_f
             logging.debug(
-                f"AND-OR Graph Search: Iteration {iteration + 1}, new f_limit={f_limit}")
-
+                f"AND-OR Graph Search: Iteration {iteration + 1}, {generated} nodes generated, new f_limit={f_limit}")
         total_time = time.time() - start_time
         logging.debug(
             f"AND-OR Graph Search failed to find solution in {total_time:.3f} seconds")
@@ -673,401 +1648,568 @@ def and_or_graph_search(start_state, goal_state):
         return None, time.time() - start_time, []
 
 
+class BeliefNode:
+    # A belief-search node: the belief it holds, its cost and the action that
+    # led to it from `parent`, so a plan is read back only once it is found.
+    __slots__ = ("belief", "g", "parent", "action")
+
+    def __init__(self, belief, g=0, parent=None, action=None):
+        self.belief = belief
+        self.g = g
+        self.parent = parent
+        self.action = action
+
+    def actions(self):
+        actions = []
+        node = self
+        while node.parent is not None:
+            actions.append(node.action)
+            node = node.parent
+        return actions[::-1]
+
+
 def search_with_partial_observations(start_state, goal_state):
-    def get_observable_state(board):
-        try:
-            i, j = find_blank(board)
-        except ValueError:
-            return frozenset()
-        observable = {}
-        observable[(i, j)] = 0
-        directions = [(-1, 0), (1, 0), (0, -1), (0, 1)]
-        for dx, dy in directions:
-            ni, nj = i + dx, j + dy
-            if is_valid(ni, nj):
-                observable[(ni, nj)] = board[ni][nj]
+    # Beliefs are sorted arrays of state ranks within the goal's parity class
+    # (see get_state_tables); a blank move is applied to every member with
+    # that blank in one successor-table lookup. Ranks put the blank in the
+    # high digit, so members are grouped by rank // HALF_TILE_PERMUTATIONS.
+    def get_observable_state(row):
+        blank = row.index(0)
+        observable = {divmod(blank, BOARD_SIZE): 0}
+        for target in MOVE_TARGETS[blank]:
+            observable[divmod(target, BOARD_SIZE)] = row[target]
         return frozenset(observable.items())
 
     def belief_state_heuristic(belief):
-        return min(manhattan_distance(state.board, goal_state) for state in belief)
-
-    def apply_action(belief, action):
-        new_belief = set()
-        for state in belief:
-            i, j = find_blank(state.board)
-            if (i, j) == (action[0], action[1]):
-                new_board = get_new_state(
-                    state.board, action[0], action[1], action[2], action[3])
-                new_state = PuzzleState(
-                    new_board, state.moves + 1, state, "Search with Partial Observations")
-                new_belief.add(new_state)
-        return new_belief
+        return int(context.manhattan_rows(cells[belief]).min())
 
-    def get_possible_actions(board):
-        try:
-            i, j = find_blank(board)
-        except ValueError:
-            return []
-        directions = [(-1, 0), (1, 0), (0, -1), (0, 1)]
-        actions = []
-        for dx, dy in directions:
-            new_i, new_j = i + dx, j + dy
-            if is_valid(new_i, new_j):
-                actions.append((i, j, new_i, new_j))
-        return actions
+    def apply_action(belief, blanks, action):
+        # Members sharing a blank move to distinct boards, so sorting is enough.
+        blank, target = action
+        return np.sort(successors[belief[blanks == blank], action_index[action]])
 
     if not is_solvable(start_state, goal_state):
         logging.info("Puzzle is not solvable")
         return None, 0, []
 
     start_time = time.time()
-    initial_state = PuzzleState(
-        start_state, strategy="Search with Partial Observations")
-    initial_belief = {initial_state}
-    queue = []
-    heapq.heappush(queue, (0, str(uuid.uuid4()),
-                   initial_belief, initial_state))
+    start_packed, goal_packed = pack_board(start_state), pack_board(goal_state)
+    context = get_heuristic_context(goal_packed)
+    cells, successors = get_state_tables(tile_parity(goal_packed))
+    goal_rank = rank_state(goal_packed, packed_blank(goal_packed))
+    action_index = {(blank, target): a
+                    for blank in range(CELL_COUNT)
+                    for a, action in enumerate(ACTIONS)
+                    for target in [ACTION_TARGETS[blank].get(action)] if target is not None}
+    initial_belief = np.array([rank_state(start_packed, packed_blank(start_packed))],
+                              dtype=np.int32)
+    counter = itertools.count()
+    queue = [(0, next(counter), BeliefNode(initial_belief))]
     visited = set()
-    g_scores = {frozenset([initial_state]): 0}
+    g_scores = {initial_belief.tobytes(): 0}
     observable_history = []
-    state_history = [initial_state]
 
     while queue:
-        _, _, current_belief, current_state = heapq.heappop(queue)
-        belief_key = frozenset(current_belief)
+        _, _, node = heapq.heappop(queue)
+        current_belief = node.belief
+        belief_key = current_belief.tobytes()
         if belief_key in visited:
             continue
         visited.add(belief_key)
 
-        observable_states = {get_observable_state(
-            state.board) for state in current_belief}
+        observable_states = {get_observable_state(row)
+                             for row in cells[current_belief].tolist()}
         observable_history.append(observable_states)
-        state_history.append(current_state)
-        logging.debug(
-            f"Step {len(observable_history)}: Observable states {observable_states}, Current board {current_state.board}")
-
-        for state in current_belief:
-            if state.board == goal_state:
-                solution_path = get_solution_path(state)
-                while len(observable_history) < len(solution_path):
-                    observable_history.append(observable_states)
-                    logging.debug(
-                        f"Padding observable_history with {observable_states}")
+        logging.debug("Step %d: Observable states %s, Belief size %d",
+                      len(observable_history), observable_states, len(current_belief))
+
+        if goal_rank in current_belief:
+            state = PuzzleState(start_packed, strategy="Search with Partial Observations",
+                                context=context)
+            for blank, target in node.actions():
+                state = PuzzleState(move_blank(state.packed, blank, target), state.moves + 1,
+                                    state, "Search with Partial Observations", target)
+            while len(observable_history) < state.moves + 1:
+                observable_history.append(observable_states)
                 logging.debug(
-                    f"Search with Partial Observations found solution in {state.moves} moves")
-                return state, time.time() - start_time, observable_history
-
-        actions = set()
-        for state in current_belief:
-            actions.update(get_possible_actions(state.board))
-
-        for action in actions:
-            new_belief = apply_action(current_belief, action)
-            if not new_belief:
-                continue
-            new_belief_key = frozenset(new_belief)
-            if new_belief_key in visited:
-                continue
-            new_g = min(state.moves for state in new_belief)
-            if new_belief_key not in g_scores or new_g < g_scores[new_belief_key]:
-                g_scores[new_belief_key] = new_g
-                h = belief_state_heuristic(new_belief)
-                f = new_g + h
-                new_state = next(iter(new_belief))
-                heapq.heappush(
-                    queue, (f, str(uuid.uuid4()), new_belief, new_state))
+                    f"Padding observable_history with {observable_states}")
+            logging.debug(
+                f"Search with Partial Observations found solution in {state.moves} moves")
+            return state, time.time() - start_time, observable_history
+
+        blanks = current_belief // HALF_TILE_PERMUTATIONS
+        new_g = node.g + 1
+        for blank in sorted(set(blanks.tolist())):
+            for target in MOVE_TARGETS[blank]:
+                action = (blank, target)
+                new_belief = apply_action(current_belief, blanks, action)
+                new_belief_key = new_belief.tobytes()
+                if new_belief_key in visited:
+                    continue
+                if new_g < g_scores.get(new_belief_key, float('inf')):
+                    g_scores[new_belief_key] = new_g
+                    f = new_g + belief_state_heuristic(new_belief)
+                    heapq.heappush(
+                        queue, (f, next(counter), BeliefNode(new_belief, new_g, node, action)))
 
     logging.debug("Search with Partial Observations failed to find solution")
     return None, time.time() - start_time, observable_history
 
 
-def search_with_no_observation(start_state, goal_state):
-    def board_to_tuple(board):
-        return tuple(num for row in board for num in row)
-
-    def tuple_to_board(board_tuple):
-        return [[board_tuple[i * 3 + j] for j in range(3)] for i in range(3)]
-
-    def find_blank_in_tuple(board_tuple):
-        try:
-            idx = board_tuple.index(0)
-            return idx // 3, idx % 3
-        except ValueError:
-            logging.error("No blank tile found in board tuple")
-            raise ValueError("Invalid board tuple: No blank tile (0) found")
-
-    def apply_action_to_board(board_tuple, action):
-        i, j = find_blank_in_tuple(board_tuple)
-        di, dj = action
-        new_i, new_j = i + di, j + dj
-        if not (0 <= new_i < 3 and 0 <= new_j < 3):
-            return None
-        idx = i * 3 + j
-        new_idx = new_i * 3 + new_j
-        board_list = list(board_tuple)
-        board_list[idx], board_list[new_idx] = board_list[new_idx], board_list[idx]
-        return tuple(board_list)
-
-    def apply_action(belief, action):
-        new_belief = set()
-        for board_tuple in belief:
-            new_board_tuple = apply_action_to_board(board_tuple, action)
-            if new_board_tuple:
-                new_belief.add(new_board_tuple)
-        return frozenset(new_belief)
+def search_with_no_observation(start_state, goal_state, belief=None):
+    # Sensorless search over beliefs stored as sorted arrays of state ranks
+    # within the goal's parity class. An action maps the whole belief through
+    # one column of the successor-rank table; a board the action cannot move
+    # stays where it is. `belief` lists the boards the puzzle may start in
+    # (just start_state by default); the plan found is replayed on
+    # start_state. Ties on f go to the deeper belief, then to an insertion
+    # counter, so the step budget is spent pushing towards singletons.
+    # Two members with the same blank cell move identically under every
+    # action and can never merge, so such beliefs are dropped outright;
+    # this replaces the old fixed cap on belief size.
+    def apply_action(belief, a):
+        moved = successors[belief, a]
+        return np.unique(np.where(moved >= 0, moved, belief))
 
     def is_goal(belief):
-        return len(belief) == 1 and goal_tuple in belief
+        return len(belief) == 1 and belief[0] == goal_rank
+
+    def is_dead(belief):
+        # Sorted ranks keep equal blanks adjacent.
+        return bool((np.diff(belief // HALF_TILE_PERMUTATIONS) == 0).any())
 
     def heuristic(belief):
-        return min(manhattan_distance(tuple_to_board(b), goal_state) for b in belief)
+        # Every member has to reach the goal, so the farthest one bounds the plan.
+        return int(context.manhattan_rows(cells[belief]).max())
 
     if not is_solvable(start_state, goal_state):
         logging.info("Puzzle is not solvable")
         return None, 0, []
 
     start_time = time.time()
-    goal_tuple = board_to_tuple(goal_state)
-    initial_belief = {board_to_tuple(start_state)}
-    initial_heuristic = manhattan_distance(start_state, goal_state)
-    ACTIONS = [(-1, 0), (1, 0), (0, -1), (0, 1)]
-    queue = []
-    heapq.heappush(queue, (0, str(uuid.uuid4()),
-                   frozenset(initial_belief), []))
+    goal_packed = pack_board(goal_state)
+    context = get_heuristic_context(goal_packed)
+    cells, successors = get_state_tables(tile_parity(goal_packed))
+    goal_rank = rank_state(goal_packed, packed_blank(goal_packed))
+    members = [pack_board(board) for board in (belief or [start_state])]
+    if not all(is_solvable(packed, goal_packed) for packed in members):
+        logging.info("Belief contains unsolvable boards")
+        return None, 0, []
+    initial_belief = np.unique(np.array(
+        [rank_state(packed, packed_blank(packed)) for packed in members], dtype=np.int32))
+    initial_heuristic = heuristic(initial_belief)
+    counter = itertools.count()
+    queue = [(0, 0, next(counter), initial_heuristic, BeliefNode(initial_belief))]
     visited = set()
     max_steps = 2000
-    max_belief_size = 50
     heuristic_threshold = initial_heuristic * 2
 
     while queue and max_steps > 0:
-        _, _, belief, path = heapq.heappop(queue)
-        if belief in visited:
+        _, _, _, h, node = heapq.heappop(queue)
+        belief = node.belief
+        belief_key = belief.tobytes()
+        if belief_key in visited:
             continue
-        visited.add(belief)
+        visited.add(belief_key)
         belief_size = len(belief)
-        h = heuristic(belief)
         logging.debug(
-            f"Search with No Observation: Belief size {belief_size}, heuristic {h}, path length {len(path)}")
-        if belief_size > max_belief_size or h > heuristic_threshold:
+            f"Search with No Observation: Belief size {belief_size}, heuristic {h}, path length {node.g}")
+        if h > heuristic_threshold or is_dead(belief):
             logging.debug(
                 f"Search with No Observation: Pruning belief, size {belief_size}, heuristic {h}")
             continue
         if is_goal(belief):
-            current_board = start_state
+            current_board = pack_board(start_state)
             current_state = PuzzleState(
-                current_board, 0, None, "Search with No Observation")
-            for action in path:
-                i, j = find_blank(current_board)
-                di, dj = action
-                new_i, new_j = i + di, j + dj
-                if is_valid(new_i, new_j):
-                    new_board = get_new_state(
-                        current_board, i, j, new_i, new_j)
+                current_board, 0, None, "Search with No Observation", context=context)
+            for action in node.actions():
+                blank = packed_blank(current_board)
+                target = ACTION_TARGETS[blank].get(ACTIONS[action])
+                if target is not None:
+                    current_board = move_blank(current_board, blank, target)
                     current_state = PuzzleState(
-                        new_board, current_state.moves + 1, current_state, "Search with No Observation")
-                    current_board = new_board
-            if current_board == goal_state:
+                        current_board, current_state.moves + 1, current_state,
+                        "Search with No Observation", target)
+            if current_board == goal_packed:
                 logging.debug(
                     f"Search with No Observation: Solution found in {current_state.moves} moves")
                 return current_state, time.time() - start_time, []
             logging.debug(
                 "Search with No Observation: Goal belief reached but path invalid")
             return None, time.time() - start_time, []
-        for action in ACTIONS:
-            new_belief = apply_action(belief, action)
-            if new_belief and new_belief not in visited:
+        for a in range(len(ACTIONS)):
+            new_belief = apply_action(belief, a)
+            if new_belief.tobytes() not in visited:
                 h = heuristic(new_belief)
-                f = len(path) + h
-                heapq.heappush(queue, (f, str(uuid.uuid4()),
-                               new_belief, path + [action]))
+                f = node.g + h
+                heapq.heappush(queue, (f, -node.g, next(counter), h,
+                               BeliefNode(new_belief, node.g + 1, node, a)))
         max_steps -= 1
     logging.debug(
         f"Search with No Observation: Failed to find solution in {time.time() - start_time:.2f} seconds")
     return None, time.time() - start_time, []
 
 
-def q_learning_solve(start_state, goal_state, episodes=5000, max_steps=100):
-    start_time = time.time()
-    if not is_solvable(start_state, goal_state):
-        logging.info("Puzzle is not solvable")
-        return None, time.time() - start_time, []
+LEGAL_ACTIONS = tuple(
+    tuple(a for a, action in enumerate(ACTIONS) if action in ACTION_TARGETS[blank])
+    for blank in range(CELL_COUNT))
+Q_ENVIRONMENT_CACHE = {}
+Q_TABLE_CACHE = {}
+VALUE_TABLE_CACHE = {}
+
+
+def new_q_table():
+    # One float32 Q-value per (state rank, ACTIONS index) of a parity class.
+    # Illegal moves hold -inf, so the max of a row only sees legal ones.
+    legal = np.array([[a in actions for a in range(len(ACTIONS))] for actions in LEGAL_ACTIONS])
+    return np.where(np.repeat(legal, HALF_TILE_PERMUTATIONS, axis=0), 0, -np.inf).astype(
+        np.float32)
+
+
+def get_q_environment(goal):
+    # (successors, rewards, goal_rank) for Q-learning towards `goal`, indexed
+    # like a Q-table. rewards[r, a] is +100 for reaching the goal, +1 when the
+    # move lowers the Manhattan distance and -1 otherwise; successors is -1
+    # where the move is illegal (LEGAL_ACTIONS lists the others per blank).
+    goal_packed = pack_board(goal)
+    if goal_packed in Q_ENVIRONMENT_CACHE:
+        return Q_ENVIRONMENT_CACHE[goal_packed]
+    cells, successors = get_state_tables(tile_parity(goal_packed))
+    goal_rank = rank_state(goal_packed, packed_blank(goal_packed))
+    distances = get_heuristic_context(goal_packed).manhattan_rows(cells)
+    next_distances = distances[np.maximum(successors, 0)]
+    rewards = np.where(next_distances < distances[:, None], 1, -1).astype(np.int8)
+    rewards[successors == goal_rank] = 100
+    environment = (successors, rewards, goal_rank)
+    Q_ENVIRONMENT_CACHE[goal_packed] = environment
+    return environment
+
+
+def train_q_table(q_table, environment, start_rank, episodes, max_steps=100, alpha=0.1,
+                  gamma=0.99, epsilon=1.0, epsilon_decay=0.995, min_epsilon=0.01):
+    # Tabular Q-learning from start_rank, updating q_table in place. The
+    # arrays are walked through flat memoryviews indexed rank * 4 + action
+    # id, so each step is a handful of integer lookups. Returns the decayed
+    # epsilon, for callers that keep training the same table.
+    successors, rewards, goal_rank = environment
+    width = len(ACTIONS)
+    q = memoryview(q_table).cast("B").cast("f")
+    next_rank = memoryview(successors).cast("B").cast("i")
+    reward = memoryview(rewards).cast("B").cast("b")
+    legal = LEGAL_ACTIONS
+    rand = random.random
+    keep = 1 - alpha
 
-    def board_to_tuple(board):
-        return tuple(tuple(row) for row in board)
-
-    def get_action_from_move(current_board, next_board):
-        try:
-            blank_i, blank_j = find_blank(current_board)
-            next_blank_i, next_blank_j = find_blank(next_board)
-        except ValueError:
-            return None
-        if next_blank_i == blank_i - 1:
-            return "up"
-        elif next_blank_i == blank_i + 1:
-            return "down"
-        elif next_blank_j == blank_j - 1:
-            return "left"
-        elif next_blank_j == blank_j + 1:
-            return "right"
-        return None
-
-    alpha = 0.1
-    gamma = 0.99
-    epsilon = 1.0
-    epsilon_decay = 0.995
-    min_epsilon = 0.01
-    q_table = {}
-    actions = ["up", "down", "left", "right"]
-
-    def get_q_value(state, action):
-        state_tuple = board_to_tuple(state)
-        key = (state_tuple, action)
-        if key not in q_table:
-            q_table[key] = 0.0
-        return q_table[key]
-
-    def choose_action(state, possible_moves, explore=True):
-        state_tuple = board_to_tuple(state)
-        valid_actions = [get_action_from_move(
-            state, move) for move in possible_moves]
-        valid_actions = [a for a in valid_actions if a]
-        if not valid_actions:
-            return None
-        if explore and random.random() < epsilon:
-            return random.choice(valid_actions)
-        q_values = [(get_q_value(state, action), action)
-                    for action in valid_actions]
-        max_q = max(q_values, key=lambda x: x[0])[0]
-        best_actions = [a for q, a in q_values if q == max_q]
-        return random.choice(best_actions)
-
-    # Training
     for episode in range(episodes):
-        current_board = copy.deepcopy(start_state)
-        current_state = PuzzleState(current_board, strategy="Q-Learning")
-        prev_h = manhattan_distance(current_board, goal_state)
-
+        state = start_rank
         for _ in range(max_steps):
-            if current_board == goal_state:
+            if state == goal_rank:
                 break
-            possible_moves = get_possible_moves(current_board)
-            action = choose_action(current_board, possible_moves, explore=True)
-            if not action:
-                break
-            blank_i, blank_j = find_blank(current_board)
-            new_i, new_j = blank_i, blank_j
-            if action == "up":
-                new_i -= 1
-            elif action == "down":
-                new_i += 1
-            elif action == "left":
-                new_j -= 1
-            elif action == "right":
-                new_j += 1
-            if not is_valid(new_i, new_j):
-                break
-            new_board = get_new_state(
-                current_board, blank_i, blank_j, new_i, new_j)
-            new_h = manhattan_distance(new_board, goal_state)
-            # Reward: +100 for goal, -1 for increasing heuristic, +1 for decreasing
-            reward = 100 if new_board == goal_state else (
-                1 if new_h < prev_h else -1)
-            next_q_values = [get_q_value(new_board, get_action_from_move(new_board, move))
-                             for move in get_possible_moves(new_board) if get_action_from_move(new_board, move)]
-            max_next_q = max(next_q_values) if next_q_values else 0
-            state_tuple = board_to_tuple(current_board)
-            q_table[(state_tuple, action)] = (1 - alpha) * get_q_value(current_board, action) + \
-                alpha * (reward + gamma * max_next_q)
-            current_state = PuzzleState(
-                new_board, current_state.moves + 1, current_state, strategy="Q-Learning")
-            current_board = new_board
-            prev_h = new_h
+            base = state * width
+            actions = legal[state // HALF_TILE_PERMUTATIONS]
+            if rand() < epsilon:
+                action = actions[int(rand() * len(actions))]
+            else:
+                best, ties = -math.inf, None
+                for a in actions:
+                    value = q[base + a]
+                    if value > best:
+                        best, action, ties = value, a, None
+                    elif value == best:
+                        ties = (ties or [action]) + [a]
+                if ties:
+                    action = ties[int(rand() * len(ties))]
+            index = base + action
+            next_state = next_rank[index]
+            next_base = next_state * width
+            max_next_q = -math.inf
+            for a in legal[next_state // HALF_TILE_PERMUTATIONS]:
+                value = q[next_base + a]
+                if value > max_next_q:
+                    max_next_q = value
+            q[index] = keep * q[index] + alpha * (reward[index] + gamma * max_next_q)
+            state = next_state
         epsilon = max(min_epsilon, epsilon * epsilon_decay)
         if episode % 1000 == 0:
             logging.debug(
                 f"Q-Learning: Episode {episode}, epsilon {epsilon:.3f}")
-
-    # Testing
-    current_board = copy.deepcopy(start_state)
-    current_state = PuzzleState(current_board, strategy="Q-Learning")
-    visited = set([get_hash(current_board)])
+    return epsilon
+
+
+def train_q_table_batched(q_table, environment, start_rank, episodes, max_steps=100,
+                          alpha=0.1, gamma=0.99, epsilon=1.0, epsilon_decay=0.995,
+                          min_epsilon=0.01, batch_size=64):
+    # train_q_table with batch_size episodes stepped together as arrays:
+    # epsilon-greedy actions, successor and reward lookups and the Q update
+    # are whole-batch NumPy operations. The update is a plain scatter, so
+    # when several episodes hit the same (state, action) in one step one of
+    # them wins rather than their steps adding up. Illegal moves are pinned
+    # to -inf first, as in new_q_table, so row maxima need no legal mask.
+    # Epsilon decays per episode as in train_q_table.
+    successors, rewards, goal_rank = environment
+    width = len(ACTIONS)
+    q_table[successors < 0] = -np.inf
+    flat_q = q_table.reshape(-1)
+    flat_successors = successors.reshape(-1)
+    flat_rewards = rewards.reshape(-1)
+    rng = np.random.default_rng(random.getrandbits(64))
+
+    for first in range(0, episodes, batch_size):
+        count = min(batch_size, episodes - first)
+        states = np.full(count, start_rank, dtype=np.int64)
+        for _ in range(max_steps):
+            states = states[states != goal_rank]
+            if not len(states):
+                break
+            q_values = q_table[states]
+            best = q_values == q_values.max(axis=1, keepdims=True)
+            explore = rng.random(len(states)) < epsilon
+            best[explore] = np.isfinite(q_values[explore])
+            actions = np.argmax(rng.random(best.shape) * best, axis=1)
+            index = states * width + actions
+            next_states = flat_successors[index].astype(np.int64)
+            targets = flat_rewards[index] + gamma * q_table[next_states].max(axis=1)
+            flat_q[index] = (1 - alpha) * flat_q[index] + alpha * targets
+            states = next_states
+        epsilon = max(min_epsilon, epsilon * epsilon_decay ** count)
+        if first % 1000 < count:
+            logging.debug(
+                f"Q-Learning: Episode {first}, epsilon {epsilon:.3f}")
+    return epsilon
+
+
+def q_table_path(goal, alpha, gamma, epsilon, epsilon_decay, min_epsilon, directory=None):
+    name = "".join(str(num) for num in packed_cells(pack_board(goal)))
+    schedule = f"a{alpha}_g{gamma}_e{epsilon}_{epsilon_decay}_{min_epsilon}"
+    return os.path.join(directory or DISTANCE_TABLE_DIR, f"qtable_{name}_{schedule}.npy")
+
+
+def get_q_table(goal, alpha=0.1, gamma=0.99, epsilon=1.0, epsilon_decay=0.995,
+                min_epsilon=0.01):
+    # The stored Q-table for this goal and training schedule, memory-mapped
+    # read-only from its .npy file, or a fresh new_q_table() when there is
+    # none yet. Copy a mapped table before training it.
+    goal_packed = pack_board(goal)
+    key = (goal_packed, alpha, gamma, epsilon, epsilon_decay, min_epsilon)
+    if key in Q_TABLE_CACHE:
+        return Q_TABLE_CACHE[key]
+    path = q_table_path(goal_packed, *key[1:])
+    table = None
+    if os.path.exists(path):
+        try:
+            table = np.load(path, mmap_mode="r")
+            if table.dtype != np.float32 or table.shape != (STATE_SPACE_SIZE, len(ACTIONS)):
+                raise ValueError(f"unexpected shape {table.shape} or dtype {table.dtype}")
+        except (OSError, ValueError) as e:
+            logging.warning(f"Discarding Q-table {path}: {str(e)}")
+            table = None
+    if table is None:
+        table = new_q_table()
+    Q_TABLE_CACHE[key] = table
+    return table
+
+
+def save_q_table(goal, table, alpha=0.1, gamma=0.99, epsilon=1.0, epsilon_decay=0.995,
+                 min_epsilon=0.01):
+    goal_packed = pack_board(goal)
+    key = (goal_packed, alpha, gamma, epsilon, epsilon_decay, min_epsilon)
+    Q_TABLE_CACHE[key] = table
+    path = q_table_path(goal_packed, *key[1:])
+    try:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, "wb") as f:
+            np.save(f, table)
+        os.replace(temp_path, path)
+    except OSError as e:
+        logging.warning(
+            f"Could not write Q-table {path}, keeping it in memory: {str(e)}")
+
+
+def follow_q_policy(q_table, environment, start_packed, context, max_steps=200):
+    # Greedy rollout of q_table from start_packed (ties broken at random);
+    # the final PuzzleState, or None if it cycles or runs out of steps.
+    successors, _, goal_rank = environment
+    start_blank = packed_blank(start_packed)
+    rank = rank_state(start_packed, start_blank)
+    current_state = PuzzleState(start_packed, strategy="Q-Learning", blank=start_blank,
+                                context=context)
+    visited = {rank}
     steps = 0
-    max_steps = 200
 
-    while current_board != goal_state and steps < max_steps:
-        possible_moves = get_possible_moves(current_board)
-        action = choose_action(current_board, possible_moves, explore=False)
-        if not action:
-            break
-        blank_i, blank_j = find_blank(current_board)
-        new_i, new_j = blank_i, blank_j
-        if action == "up":
-            new_i -= 1
-        elif action == "down":
-            new_i += 1
-        elif action == "left":
-            new_j -= 1
-        elif action == "right":
-            new_j += 1
-        if not is_valid(new_i, new_j):
-            break
-        new_board = get_new_state(
-            current_board, blank_i, blank_j, new_i, new_j)
-        new_hash = get_hash(new_board)
-        if new_hash in visited:
+    while rank != goal_rank and steps < max_steps:
+        actions = LEGAL_ACTIONS[current_state.blank]
+        q_values = q_table[rank]
+        best = max(q_values[a] for a in actions)
+        action = random.choice([a for a in actions if q_values[a] == best])
+        rank = int(successors[rank, action])
+        if rank in visited:
             logging.debug("Q-Learning: Cycle detected during testing")
-            break
-        visited.add(new_hash)
+            return None
+        visited.add(rank)
+        blank = current_state.blank
+        new_blank = ACTION_TARGETS[blank][ACTIONS[action]]
         current_state = PuzzleState(
-            new_board, current_state.moves + 1, current_state, strategy="Q-Learning")
-        current_board = new_board
+            move_blank(current_state.packed, blank, new_blank), current_state.moves + 1,
+            current_state, strategy="Q-Learning", blank=new_blank,
+            h=current_state.h + context.delta(current_state.packed, blank, new_blank))
         steps += 1
+    return current_state if rank == goal_rank else None
+
+
+def q_learning_solve(start_state, goal_state, episodes=5000, max_steps=100, alpha=0.1,
+                     gamma=0.99, epsilon=1.0, epsilon_decay=0.995, min_epsilon=0.01,
+                     policy_only=True, q_table=None, batch_size=1):
+    # Warm-starts from the stored Q-table for this goal and schedule (see
+    # get_q_table), trains it from the start state and saves it back. With
+    # `policy_only`, training is skipped when the stored greedy policy
+    # already reaches the goal. A caller-supplied q_table is trained in
+    # place instead and never stored. batch_size > 1 trains with
+    # train_q_table_batched.
+    start_time = time.time()
+    if not is_solvable(start_state, goal_state):
+        logging.info("Puzzle is not solvable")
+        return None, time.time() - start_time, []
+
+    start_packed = pack_board(start_state)
+    goal_packed = pack_board(goal_state)
+    context = get_heuristic_context(goal_packed)
+    environment = get_q_environment(goal_packed)
+    schedule = dict(alpha=alpha, gamma=gamma, epsilon=epsilon,
+                    epsilon_decay=epsilon_decay, min_epsilon=min_epsilon)
+    stored = q_table is None
+    if stored:
+        q_table = get_q_table(goal_packed, **schedule)
+
+    solution = None
+    if policy_only:
+        solution = follow_q_policy(q_table, environment, start_packed, context)
+        if solution:
+            logging.debug("Q-Learning: stored policy reaches the goal, skipping training")
+    if solution is None:
+        if not q_table.flags.writeable:
+            q_table = np.array(q_table)
+        start_rank = rank_state(start_packed, packed_blank(start_packed))
+        if batch_size > 1:
+            train_q_table_batched(q_table, environment, start_rank, episodes, max_steps,
+                                  batch_size=batch_size, **schedule)
+        else:
+            train_q_table(q_table, environment, start_rank, episodes, max_steps, **schedule)
+        if stored:
+            save_q_table(goal_packed, q_table, **schedule)
+        solution = follow_q_policy(q_table, environment, start_packed, context)
 
-    if current_board == goal_state:
+    if solution:
         logging.debug(
-            f"Q-Learning found solution in {current_state.moves} moves")
-        return current_state, time.time() - start_time, []
+            f"Q-Learning found solution in {solution.moves} moves")
+        return solution, time.time() - start_time, []
     else:
         logging.debug("Q-Learning failed to find solution")
         return None, time.time() - start_time, []
 
 
+def value_iteration(goal, rewards=None, gamma=1.0, tolerance=1e-6, max_sweeps=10000):
+    # Synchronous Bellman backups V(s) = max_a rewards[s, a] + gamma * V(next)
+    # over every state of the goal's parity class, indexed by rank, with the
+    # goal held at 0 as the terminal state. By default every move costs 1,
+    # which makes V the negated distance to the goal; pass
+    # get_q_environment(goal)[1] and Q-learning's gamma to solve the MDP that
+    # q_learning_solve samples. Returns (values, stats) where stats holds the
+    # sweep count, the largest change of each sweep, whether it converged
+    # and the time taken.
+    start_time = time.time()
+    goal_packed = pack_board(goal)
+    _, successors = get_state_tables(tile_parity(goal_packed))
+    goal_rank = rank_state(goal_packed, packed_blank(goal_packed))
+    legal = successors >= 0
+    next_states = np.where(legal, successors, 0)
+    if rewards is None:
+        rewards = -1.0
+    rewards = np.where(legal, rewards, -np.inf)
+    values = np.zeros(STATE_SPACE_SIZE)
+    residuals = []
+    for _ in range(max_sweeps):
+        new_values = (rewards + gamma * values[next_states]).max(axis=1)
+        new_values[goal_rank] = 0
+        residuals.append(float(np.abs(new_values - values).max()))
+        values = new_values
+        if residuals[-1] <= tolerance:
+            break
+    stats = {"sweeps": len(residuals), "residuals": residuals,
+             "converged": bool(residuals) and residuals[-1] <= tolerance,
+             "seconds": time.time() - start_time}
+    logging.debug(
+        f"Value iteration: {stats['sweeps']} sweeps, last residual {residuals[-1]:.3g}, "
+        f"{stats['seconds']:.3f} seconds")
+    return values, stats
+
+
+def value_iteration_solve(start_state, goal_state):
+    # Greedy policy of the unit-cost value function, cached per goal; moving
+    # to the successor of highest value is an optimal move.
+    start_time = time.time()
+    if not is_solvable(start_state, goal_state):
+        logging.info("Puzzle is not solvable")
+        return None, time.time() - start_time, []
+    goal_packed = pack_board(goal_state)
+    if goal_packed not in VALUE_TABLE_CACHE:
+        VALUE_TABLE_CACHE[goal_packed], _ = value_iteration(goal_packed)
+    values = VALUE_TABLE_CACHE[goal_packed]
+    _, successors = get_state_tables(tile_parity(goal_packed))
+    context = get_heuristic_context(goal_packed)
+    current = PuzzleState(start_state, strategy="Value Iteration", context=context)
+    rank = rank_state(current.packed, current.blank)
+
+    while current.packed != goal_packed:
+        actions = LEGAL_ACTIONS[current.blank]
+        action = max(actions, key=lambda a: values[successors[rank, a]])
+        rank = int(successors[rank, action])
+        target = ACTION_TARGETS[current.blank][ACTIONS[action]]
+        current = PuzzleState(move_blank(current.packed, current.blank, target),
+                              current.moves + 1, current, "Value Iteration", target)
+    logging.debug(f"Value Iteration found solution in {current.moves} moves")
+    return current, time.time() - start_time, []
+
+
 def local_beam_search_solve(start_state, goal_state, beam_width=4, max_iterations=1000):
     def performance(state, goal):
-        return manhattan_distance(state.board, goal)
+        return state.h
 
     if not is_solvable(start_state, goal_state):
         logging.info("Puzzle is not solvable")
         return None, time.time(), []
 
     start_time = time.time()
-    best_hypothesis = PuzzleState(start_state, strategy="Local Beam Search")
+    goal_packed = pack_board(goal_state)
+    context = get_heuristic_context(goal_state)
+    best_hypothesis = PuzzleState(
+        start_state, strategy="Local Beam Search", context=context)
     candidate_hypotheses = [best_hypothesis]
-    best_performance = performance(best_hypothesis, goal_state)
-    visited = set([get_hash(start_state)])
+    best_performance = performance(best_hypothesis, goal_packed)
+    visited = set([best_hypothesis.packed])
     iteration = 0
 
     while candidate_hypotheses and iteration < max_iterations:
         # Generate all possible successors
         new_candidate_hypotheses = []
         for hypothesis in candidate_hypotheses:
-            possible_moves = get_possible_moves(hypothesis.board)
-            for new_board in possible_moves:
-                new_state_hash = get_hash(new_board)
-                if new_state_hash not in visited:
+            for new_board, new_blank, new_h in context.successors(
+                    hypothesis.packed, hypothesis.blank, hypothesis.h):
+                if new_board not in visited:
                     new_state = PuzzleState(
                         new_board,
                         hypothesis.moves + 1,
                         hypothesis,
-                        strategy="Local Beam Search"
+                        strategy="Local Beam Search",
+                        blank=new_blank,
+                        h=new_h
                     )
-                    if is_valid_move(hypothesis.board, new_board):
-                        new_candidate_hypotheses.append(new_state)
-                        visited.add(new_state_hash)
+                    new_candidate_hypotheses.append(new_state)
+                    visited.add(new_board)
 
         # Update best hypothesis
         for new_hyp in new_candidate_hypotheses:
-            current_perf = performance(new_hyp, goal_state)
+            current_perf = performance(new_hyp, goal_packed)
             if current_perf < best_performance:
                 best_hypothesis = new_hyp
                 best_performance = current_perf
@@ -1075,13 +2217,13 @@ def local_beam_search_solve(start_state, goal_state, beam_width=4, max_iteration
                     f"Local Beam Search: New best heuristic {best_performance} at iteration {iteration}")
 
             # Check if goal is reached
-            if new_hyp.board == goal_state:
+            if new_hyp.packed == goal_packed:
                 logging.debug(
                     f"Local Beam Search: Solution found in {new_hyp.moves} moves at iteration {iteration}")
                 return new_hyp, time.time() - start_time, []
 
         # Select top k hypotheses based on performance
-        new_candidate_hypotheses.sort(key=lambda x: performance(x, goal_state))
+        new_candidate_hypotheses.sort(key=lambda x: performance(x, goal_packed))
         candidate_hypotheses = new_candidate_hypotheses[:beam_width]
 
         iteration += 1
@@ -1092,7 +2234,7 @@ def local_beam_search_solve(start_state, goal_state, beam_width=4, max_iteration
     logging.debug(
         "Local Beam Search: Did not find solution, attempting BFS reconstruction")
     total_time = time.time() - start_time
-    if best_hypothesis.board == goal_state:
+    if best_hypothesis.packed == goal_packed:
         return best_hypothesis, total_time, []
 
     # Reconstruct a valid path to the goal using BFS
@@ -1110,215 +2252,257 @@ def local_beam_search_solve(start_state, goal_state, beam_width=4, max_iteration
 
 def generate_random_solvable_state(goal_state):
     max_attempts = 100
+    geometry = board_geometry(goal_state)
+    goal_packed = pack_board(goal_state)
     for _ in range(max_attempts):
-        current_board = copy.deepcopy(goal_state)
+        current_board = goal_packed
+        blank = geometry.blank(goal_packed)
         moves = 20
         for _ in range(moves):
-            possible_moves = get_possible_moves(current_board)
-            if possible_moves:
-                current_board = random.choice(possible_moves)
-        if is_solvable(current_board, goal_state) and current_board != goal_state:
-            return current_board
+            current_board, blank = random.choice(
+                geometry.successors(current_board, blank))
+        if current_board != goal_packed:
+            return geometry.unpack(current_board)
     logging.error(
         f"Failed to generate solvable state after {max_attempts} attempts")
     raise ValueError(
         f"Không thể tạo trạng thái ngẫu nhiên khả thi sau {max_attempts} lần thử.")
 
 
-def solve_puzzle(start_state, goal_state, strategy="BFS"):
+def solve_puzzle(start_state, goal_state, strategy="BFS", heuristic=None):
     start_time = time.time()
     if not is_solvable(start_state, goal_state):
         logging.info("Puzzle is not solvable")
         return None, time.time() - start_time, []
 
     logging.debug(f"Input start_state for {strategy}: {start_state}")
+    geometry = board_geometry(goal_state)
+    if geometry is not DEFAULT_GEOMETRY and strategy not in GEOMETRY_STRATEGIES:
+        raise ValueError(f"{strategy} only supports {BOARD_SIZE}x{BOARD_SIZE} boards")
+    goal_packed = pack_board(goal_state)
+    context = get_heuristic_context(
+        goal_packed, heuristic if strategy in HEURISTIC_SELECTABLE_STRATEGIES else None, geometry)
+    state_key = geometry.state_key
 
     if strategy == "DFS":
-        stack = [PuzzleState(start_state, strategy="DFS")]
-        visited = {}
+        start = PuzzleState(start_state, strategy="DFS", context=context)
+        stack = [(start, state_key(start.packed, start.blank))]
+        visited = geometry.cost_table("I")
         states_explored = [0]
 
         while stack:
-            current = stack.pop()
+            current, rank = stack.pop()
             states_explored[0] += 1
 
-            state_hash = hash(tuple(tuple(row) for row in current.board))
-            if state_hash in visited and visited[state_hash] <= current.moves:
+            if visited[rank] <= current.moves:
                 continue
 
-            visited[state_hash] = current.moves
+            visited[rank] = current.moves
 
-            if current.board == goal_state:
+            if current.packed == goal_packed:
                 logging.debug(
                     f"DFS found solution in {current.moves} moves, explored {states_explored[0]} states")
                 return current, time.time() - start_time, []
 
-            for new_board in get_possible_moves(current.board):
-                new_state = PuzzleState(
-                    new_board, current.moves + 1, current, strategy="DFS")
-                new_state_hash = hash(tuple(tuple(row) for row in new_board))
-                if new_state_hash not in visited or visited[new_state_hash] > new_state.moves:
-                    stack.append(new_state)
+            for new_state in current.successors():
+                new_rank = state_key(new_state.packed, new_state.blank)
+                if visited[new_rank] > new_state.moves:
+                    stack.append((new_state, new_rank))
 
         logging.debug(
             f"DFS failed to find solution, explored {states_explored[0]} states")
         return None, time.time() - start_time, []
 
     elif strategy == "BFS":
-        queue = deque([PuzzleState(start_state, strategy="BFS")])
-        visited = set()
+        start = PuzzleState(start_state, strategy="BFS", context=context)
+        queue = deque([start])
+        visited = geometry.visited_set()
+        visited.add(state_key(start.packed, start.blank))
         while queue:
             current = queue.popleft()
-            if current.board == goal_state:
+            if current.packed == goal_packed:
                 logging.debug(f"BFS found solution in {current.moves} moves")
                 return current, time.time() - start_time, []
-            if current in visited:
-                continue
-            visited.add(current)
-            for new_board in get_possible_moves(current.board):
-                new_state = PuzzleState(
-                    new_board, current.moves + 1, current, strategy="BFS")
-                if new_state not in visited:
-                    queue.append(new_state)
+            for new_packed, new_blank in geometry.successors(current.packed, current.blank):
+                new_rank = state_key(new_packed, new_blank)
+                if new_rank not in visited:
+                    visited.add(new_rank)
+                    queue.append(PuzzleState(
+                        new_packed, current.moves + 1, current, "BFS", new_blank))
         logging.debug("BFS failed to find solution")
         return None, time.time() - start_time, []
 
-    elif strategy == "UCS":
-        queue = []
-        heapq.heappush(queue, PuzzleState(start_state, strategy="UCS"))
-        visited = set()
+    elif strategy in ["UCS", "A*"]:
+        # Unit step costs: priority() is g for UCS and g + h for A*. g_score
+        # holds the best g pushed per state; a successor that does not beat
+        # it is dropped at generation, and a popped entry whose g has since
+        # been beaten is stale and skipped.
+        start = PuzzleState(start_state, strategy=strategy, context=context)
+        queue = BucketQueue()
+        queue.push(start.priority(), start)
+        g_score = geometry.cost_table("H")
+        g_score[state_key(start.packed, start.blank)] = 0
+        expanded = pruned = 0
+        peak_frontier = 1
         while queue:
-            current = heapq.heappop(queue)
-            if current.board == goal_state:
-                logging.debug(f"UCS found solution in {current.moves} moves")
-                return current, time.time() - start_time, []
-            if current in visited:
+            current = queue.pop()
+            if current.moves > g_score[state_key(current.packed, current.blank)]:
                 continue
-            visited.add(current)
-            for new_board in get_possible_moves(current.board):
-                new_state = PuzzleState(
-                    new_board, current.moves + 1, current, strategy="UCS")
-                if new_state not in visited:
-                    heapq.heappush(queue, new_state)
-        logging.debug("UCS failed to find solution")
+            if current.packed == goal_packed:
+                logging.debug(
+                    f"{strategy} found solution in {current.moves} moves, expanded {expanded} states, "
+                    f"peak frontier {peak_frontier}, pruned {pruned} duplicates")
+                return current, time.time() - start_time, []
+            expanded += 1
+            for new_state in current.successors():
+                new_key = state_key(new_state.packed, new_state.blank)
+                if new_state.moves < g_score[new_key]:
+                    g_score[new_key] = new_state.moves
+                    queue.push(new_state.priority(), new_state)
+                else:
+                    pruned += 1
+            peak_frontier = max(peak_frontier, len(queue))
+        logging.debug(
+            f"{strategy} failed to find solution, expanded {expanded} states, "
+            f"peak frontier {peak_frontier}, pruned {pruned} duplicates")
         return None, time.time() - start_time, []
 
-    elif strategy in ["Greedy", "A*"]:
-        queue = []
-        heapq.heappush(queue, PuzzleState(start_state, strategy=strategy))
-        visited = set()
+    elif strategy == "Greedy":
+        start = PuzzleState(start_state, strategy=strategy, context=context)
+        counter = itertools.count()
+        queue = [(start.priority(), start.h, next(counter), start)]
+        visited = geometry.visited_set()
         while queue:
-            current = heapq.heappop(queue)
-            if current.board == goal_state:
+            current = heapq.heappop(queue)[3]
+            if current.packed == goal_packed:
                 logging.debug(
                     f"{strategy} found solution in {current.moves} moves")
                 return current, time.time() - start_time, []
-            if current in visited:
+            rank = state_key(current.packed, current.blank)
+            if rank in visited:
                 continue
-            visited.add(current)
-            for new_board in get_possible_moves(current.board):
-                new_state = PuzzleState(
-                    new_board, current.moves + 1, current, strategy)
-                if new_state not in visited:
-                    heapq.heappush(queue, new_state)
+            visited.add(rank)
+            for new_state in current.successors():
+                if state_key(new_state.packed, new_state.blank) not in visited:
+                    heapq.heappush(queue, (new_state.priority(), new_state.h,
+                                           next(counter), new_state))
         logging.debug(f"{strategy} failed to find solution")
         return None, time.time() - start_time, []
 
     elif strategy == "IDA*":
-        def search(state, cost_limit, visited):
-            f = state.moves + state.h
-            if f > cost_limit:
-                return None, f
-            if state.board == goal_state:
-                return state, cost_limit
-            min_exceeded_cost = float('inf')
-            visited.add(state)
-            for new_board in get_possible_moves(state.board):
-                new_state = PuzzleState(
-                    new_board, state.moves + 1, state, strategy)
-                if new_state not in visited:
-                    result, new_cost = search(new_state, cost_limit, visited)
-                    if result:
-                        return result, cost_limit
-                    min_exceeded_cost = min(min_exceeded_cost, new_cost)
-            visited.remove(state)
-            return None, min_exceeded_cost
-
-        start = PuzzleState(start_state, strategy="IDA*")
+        # Depth-first probes run on one flat board that is mutated in place:
+        # a move swaps the blank with a neighbour and backtracking swaps it
+        # back, so no state is allocated while searching. The path itself is
+        # the list of blank cells, cursor[d] is the next move to try at
+        # depth d, and the move that would undo the last one is skipped.
+        start = PuzzleState(start_state, strategy="IDA*", context=context)
+        if start.packed == goal_packed:
+            return start, time.time() - start_time, []
+        cells = geometry.cells(start.packed)
+        bits = geometry.cell_bits
+        count = geometry.cell_count
+        move_targets = geometry.move_targets
+        move_delta = context.move_delta
+        incremental = context.incremental
+        evaluate = context.evaluate
+        packed = start.packed
         cost_limit = start.h
-        while True:
-            visited = set()
-            result, new_limit = search(start, cost_limit, visited)
-            if result:
-                logging.debug(f"IDA* found solution in {result.moves} moves")
-                return result, time.time() - start_time, []
-            if new_limit == float('inf'):
-                logging.debug("IDA* failed to find solution")
-                return None, time.time() - start_time, []
-            cost_limit = new_limit
+        path = None
+        while path is None:
+            blanks = [start.blank]
+            h_values = [start.h]
+            cursor = [0]
+            next_limit = float('inf')
+            nodes = 0
+            while cursor:
+                blank = blanks[-1]
+                targets = move_targets[blank]
+                index = cursor[-1]
+                if index == len(targets):
+                    cursor.pop()
+                    h_values.pop()
+                    blanks.pop()
+                    if blanks:
+                        parent = blanks[-1]
+                        tile = cells[parent]
+                        cells[blank] = tile
+                        cells[parent] = 0
+                        packed += (tile << blank * bits) - (tile << parent * bits)
+                    continue
+                cursor[-1] = index + 1
+                target = targets[index]
+                if len(blanks) > 1 and target == blanks[-2]:
+                    continue
+                tile = cells[target]
+                cells[blank] = tile
+                cells[target] = 0
+                packed += (tile << blank * bits) - (tile << target * bits)
+                nodes += 1
+                if incremental:
+                    h = h_values[-1] + move_delta[(tile * count + target) * count + blank]
+                else:
+                    h = evaluate(packed)
+                f = len(blanks) + h
+                if f <= cost_limit and packed == goal_packed:
+                    path = blanks[1:] + [target]
+                    break
+                if f > cost_limit:
+                    if f < next_limit:
+                        next_limit = f
+                    cells[target] = tile
+                    cells[blank] = 0
+                    packed += (tile << target * bits) - (tile << blank * bits)
+                    continue
+                blanks.append(target)
+                h_values.append(h)
+                cursor.append(0)
+            logging.debug(f"IDA* bound {cost_limit}: {nodes} nodes generated")
+            if path is None:
+                if next_limit == float('inf'):
+                    logging.debug("IDA* failed to find solution")
+                    return None, time.time() - start_time, []
+                cost_limit = next_limit
+
+        result = start
+        for target in path:
+            result = PuzzleState(geometry.move(result.packed, result.blank, target),
+                                 result.moves + 1, result, "IDA*", target, context)
+        logging.debug(f"IDA* found solution in {result.moves} moves")
+        return result, time.time() - start_time, []
 
     elif strategy == "IDS":
-        def dfs_limited(state, depth_limit, visited):
-            if state.board == goal_state:
-                return state
-            if state.moves >= depth_limit:
-                return None
-            visited.add(state)
-            for new_board in get_possible_moves(state.board):
-                new_state = PuzzleState(
-                    new_board, state.moves + 1, state, strategy)
-                if new_state not in visited:
-                    result = dfs_limited(new_state, depth_limit, visited)
-                    if result:
-                        return result
-            return None
-
-        start = PuzzleState(start_state, strategy="IDS")
-        depth = 0
-        while depth < 100:
-            visited = set()
-            result = dfs_limited(start, depth, visited)
-            if result:
-                logging.debug(
-                    f"IDS found solution in {result.moves} moves at depth {depth}")
-                return result, time.time() - start_time, []
-            depth += 1
-        logging.debug("IDS failed to find solution")
-        return None, time.time() - start_time, []
+        return iterative_deepening_solve(start_state, goal_state)
 
     elif strategy == "Simple Hill Climbing":
-        original_start_state = copy.deepcopy(start_state)
+        original_start_state = pack_board(start_state)
         max_restarts = 50
         max_steps = 1000
         global_visited = set()
         best_state = None
         best_heuristic = float('inf')
-        initial_state = PuzzleState(original_start_state, strategy=strategy)
+        initial_state = PuzzleState(original_start_state, strategy=strategy, context=context)
         # Start with initial state
-        solution_path = [(initial_state.board, initial_state.moves)]
+        solution_path = [(initial_state.packed, initial_state.moves)]
 
         def perturb_state(state, max_moves=10):
-            current_board = copy.deepcopy(state)
-            current_state = PuzzleState(current_board, strategy=strategy)
+            current_state = PuzzleState(state, strategy=strategy, context=context)
             for _ in range(random.randint(1, max_moves)):
-                moves = get_possible_moves(current_state.board)
+                moves = current_state.successors()
                 if moves:
-                    new_board = random.choice(moves)
-                    current_state = PuzzleState(
-                        new_board, current_state.moves + 1, current_state, strategy=strategy)
-            return current_state.board
+                    current_state = random.choice(moves)
+            return current_state.packed
 
         for restart in range(max_restarts):
-            working_state = copy.deepcopy(
-                original_start_state) if restart == 0 else perturb_state(original_start_state)
+            working_state = original_start_state if restart == 0 else perturb_state(
+                original_start_state)
             logging.debug(
                 f"Simple Hill Climbing: Restart {restart + 1}, working_state: {working_state}")
-            current = PuzzleState(working_state, strategy=strategy)
+            current = PuzzleState(working_state, strategy=strategy, context=context)
             visited = set()
             steps = 0
 
-            while current.board != goal_state and steps < max_steps:
-                state_hash = get_hash(current.board)
+            while current.packed != goal_packed and steps < max_steps:
+                state_hash = current.packed
                 if state_hash in visited:
                     logging.debug(
                         f"Simple Hill Climbing: Cycle detected at state {current.board}")
@@ -1327,22 +2511,20 @@ def solve_puzzle(start_state, goal_state, strategy="BFS"):
                 global_visited.add(state_hash)
                 best_neighbor = None
                 best_heuristic_neighbor = current.h
-                neighbors = get_possible_moves(current.board)
+                neighbors = current.successors()
                 if not neighbors:
                     logging.debug(
                         f"Simple Hill Climbing: No valid neighbors for state {current.board}")
                     break
                 random.shuffle(neighbors)
-                for new_board in neighbors:
-                    new_state = PuzzleState(
-                        new_board, current.moves + 1, current, strategy)
-                    if new_state.h <= best_heuristic_neighbor and get_hash(new_board) not in global_visited:
+                for new_state in neighbors:
+                    if new_state.h <= best_heuristic_neighbor and new_state.packed not in global_visited:
                         best_heuristic_neighbor = new_state.h
                         best_neighbor = new_state
                         break  # Take first equal or better neighbor
                 if best_neighbor:
                     current = best_neighbor
-                    solution_path.append((current.board, current.moves))
+                    solution_path.append((current.packed, current.moves))
                     if current.h < best_heuristic:
                         best_state = current
                         best_heuristic = current.h
@@ -1352,19 +2534,19 @@ def solve_puzzle(start_state, goal_state, strategy="BFS"):
                     break
                 steps += 1
 
-            if current.board == goal_state:
+            if current.packed == goal_packed:
                 logging.debug(
                     f"Simple Hill Climbing: Solution found in {current.moves} moves")
                 logging.debug(
-                    f"Solution path initial state: {solution_path[0][0]}")
+                    f"Solution path initial state: {geometry.unpack(solution_path[0][0])}")
                 return current, time.time() - start_time, []
 
         logging.debug(
             f"Simple Hill Climbing: Best state: {best_state.board if best_state else None}")
-        logging.debug(f"Solution path initial state: {solution_path[0][0]}")
+        logging.debug(f"Solution path initial state: {geometry.unpack(solution_path[0][0])}")
         # Reconstruct path from start_state to goal_state using BFS
         valid_solution, bfs_time, history = solve_puzzle(
-            original_start_state, goal_state, "BFS")
+            start_state, goal_state, "BFS")
         total_time = time.time() - start_time + bfs_time
         if valid_solution:
             logging.debug(
@@ -1374,38 +2556,35 @@ def solve_puzzle(start_state, goal_state, strategy="BFS"):
         return best_state, time.time() - start_time, []
 
     elif strategy == "Steepest-Hill Climbing":
-        original_start_state = copy.deepcopy(start_state)
+        original_start_state = pack_board(start_state)
         max_restarts = 50
         max_steps = 1000
         global_visited = set()
         best_state = None
         best_heuristic = float('inf')
-        initial_state = PuzzleState(original_start_state, strategy=strategy)
+        initial_state = PuzzleState(original_start_state, strategy=strategy, context=context)
         # Start with initial state
-        solution_path = [(initial_state.board, initial_state.moves)]
+        solution_path = [(initial_state.packed, initial_state.moves)]
 
         def perturb_state(state, max_moves=10):
-            current_board = copy.deepcopy(state)
-            current_state = PuzzleState(current_board, strategy=strategy)
+            current_state = PuzzleState(state, strategy=strategy, context=context)
             for _ in range(random.randint(1, max_moves)):
-                moves = get_possible_moves(current_state.board)
+                moves = current_state.successors()
                 if moves:
-                    new_board = random.choice(moves)
-                    current_state = PuzzleState(
-                        new_board, current_state.moves + 1, current_state, strategy=strategy)
-            return current_state.board
+                    current_state = random.choice(moves)
+            return current_state.packed
 
         for restart in range(max_restarts):
-            working_state = copy.deepcopy(
-                original_start_state) if restart == 0 else perturb_state(original_start_state)
+            working_state = original_start_state if restart == 0 else perturb_state(
+                original_start_state)
             logging.debug(
                 f"Steepest-Hill Climbing: Restart {restart + 1}, working_state: {working_state}")
-            current = PuzzleState(working_state, strategy=strategy)
+            current = PuzzleState(working_state, strategy=strategy, context=context)
             visited = set()
             steps = 0
 
-            while current.board != goal_state and steps < max_steps:
-                state_hash = get_hash(current.board)
+            while current.packed != goal_packed and steps < max_steps:
+                state_hash = current.packed
                 if state_hash in visited:
                     logging.debug(
                         f"Steepest-Hill Climbing: Cycle detected at state {current.board}")
@@ -1414,21 +2593,19 @@ def solve_puzzle(start_state, goal_state, strategy="BFS"):
                 global_visited.add(state_hash)
                 best_neighbor = None
                 best_heuristic_neighbor = float('inf')
-                neighbors = get_possible_moves(current.board)
+                neighbors = current.successors()
                 if not neighbors:
                     logging.debug(
                         f"Steepest-Hill Climbing: No valid neighbors for state {current.board}")
                     break
                 random.shuffle(neighbors)
-                for new_board in neighbors:
-                    new_state = PuzzleState(
-                        new_board, current.moves + 1, current, strategy)
-                    if new_state.h < best_heuristic_neighbor and get_hash(new_board) not in global_visited:
+                for new_state in neighbors:
+                    if new_state.h < best_heuristic_neighbor and new_state.packed not in global_visited:
                         best_heuristic_neighbor = new_state.h
                         best_neighbor = new_state
                 if best_neighbor and best_heuristic_neighbor < current.h:
                     current = best_neighbor
-                    solution_path.append((current.board, current.moves))
+                    solution_path.append((current.packed, current.moves))
                     if current.h < best_heuristic:
                         best_state = current
                         best_heuristic = current.h
@@ -1438,19 +2615,19 @@ def solve_puzzle(start_state, goal_state, strategy="BFS"):
                     break
                 steps += 1
 
-            if current.board == goal_state:
+            if current.packed == goal_packed:
                 logging.debug(
                     f"Steepest-Hill Climbing: Solution found in {current.moves} moves")
                 logging.debug(
-                    f"Solution path initial state: {solution_path[0][0]}")
+                    f"Solution path initial state: {geometry.unpack(solution_path[0][0])}")
                 return current, time.time() - start_time, []
 
         logging.debug(
             f"Steepest-Hill Climbing: Best state: {best_state.board if best_state else None}")
-        logging.debug(f"Solution path initial state: {solution_path[0][0]}")
+        logging.debug(f"Solution path initial state: {geometry.unpack(solution_path[0][0])}")
         # Reconstruct path from start_state to goal_state using BFS
         valid_solution, bfs_time, history = solve_puzzle(
-            original_start_state, goal_state, "BFS")
+            start_state, goal_state, "BFS")
         total_time = time.time() - start_time + bfs_time
         if valid_solution:
             logging.debug(
@@ -1460,37 +2637,33 @@ def solve_puzzle(start_state, goal_state, strategy="BFS"):
         return best_state, time.time() - start_time, []
 
     elif strategy == "Stochastic Hill Climbing":
-        original_start_state = copy.deepcopy(start_state)
+        original_start_state = pack_board(start_state)
         max_restarts = 200
         max_steps = 1000
 
         def perturb_state(state, max_moves=5):
-            current_board = copy.deepcopy(state)
-            current_state = PuzzleState(current_board, strategy=strategy)
+            current_state = PuzzleState(state, strategy=strategy, context=context)
             for _ in range(random.randint(1, max_moves)):
-                moves = get_possible_moves(current_state.board)
+                moves = current_state.successors()
                 if moves:
-                    new_board = random.choice(moves)
-                    current_state = PuzzleState(
-                        new_board, current_state.moves + 1, current_state, strategy=strategy)
-            return current_state.board
+                    current_state = random.choice(moves)
+            return current_state.packed
 
         for restart in range(max_restarts):
             # Use original start_state for first restart, perturb it for subsequent restarts
-            working_state = copy.deepcopy(
-                original_start_state) if restart == 0 else perturb_state(original_start_state)
-            current = PuzzleState(working_state, strategy=strategy)
+            working_state = original_start_state if restart == 0 else perturb_state(
+                original_start_state)
+            current = PuzzleState(working_state, strategy=strategy, context=context)
             visited = set()
 
             for step in range(max_steps):
-                if current.board == goal_state:
+                if current.packed == goal_packed:
                     logging.debug(
                         f"Stochastic Hill Climbing: Solution found in {current.moves} moves")
                     return current, time.time() - start_time, []
-                state_hash = get_hash(current.board)
+                state_hash = current.packed
                 visited.add(state_hash)
-                next_states = [PuzzleState(new_board, current.moves + 1, current, strategy)
-                               for new_board in get_possible_moves(current.board)]
+                next_states = current.successors()
                 if not next_states:
                     logging.debug(
                         f"Stochastic Hill Climbing: No moves available at state {current.board}")
@@ -1511,7 +2684,7 @@ def solve_puzzle(start_state, goal_state, strategy="BFS"):
         return None, time.time() - start_time, []
 
     elif strategy == "Simulated Annealing":
-        current = PuzzleState(start_state, strategy=strategy)
+        current = PuzzleState(start_state, strategy=strategy, context=context)
         best_state = current
         best_heuristic = current.h
         temperature = 1000.0
@@ -1521,13 +2694,12 @@ def solve_puzzle(start_state, goal_state, strategy="BFS"):
         max_iterations = 2000
 
         for iteration in range(max_iterations):
-            if current.board == goal_state:
+            if current.packed == goal_packed:
                 logging.debug(
                     f"Simulated Annealing found solution in {current.moves} moves")
                 return current, time.time() - start_time, []
 
-            next_states = [PuzzleState(new_board, current.moves + 1, current, strategy)
-                           for new_board in get_possible_moves(current.board)]
+            next_states = current.successors()
             if not next_states:
                 break
 
@@ -1548,7 +2720,7 @@ def solve_puzzle(start_state, goal_state, strategy="BFS"):
 
             if stagnant_steps >= max_stagnant:
                 if random.random() < 0.5:
-                    current = PuzzleState(start_state, strategy=strategy)
+                    current = PuzzleState(start_state, strategy=strategy, context=context)
                     stagnant_steps = 0
                 else:
                     current = best_state
@@ -1559,7 +2731,7 @@ def solve_puzzle(start_state, goal_state, strategy="BFS"):
             if temperature < 0.1:
                 temperature = 50.0
 
-        if best_state.board == goal_state:
+        if best_state.packed == goal_packed:
             logging.debug(
                 f"Simulated Annealing found solution in {best_state.moves} moves")
             return best_state, time.time() - start_time, []
@@ -1574,7 +2746,7 @@ def solve_puzzle(start_state, goal_state, strategy="BFS"):
     elif strategy == "Local Beam Search":
         solution, solving_time, observable_history = local_beam_search_solve(
             start_state, goal_state)
-        if solution and solution.board == goal_state:
+        if solution and solution.packed == goal_packed:
             logging.debug(
                 f"Local Beam Search found solution in {solution.moves} moves")
         else:
@@ -1584,7 +2756,7 @@ def solve_puzzle(start_state, goal_state, strategy="BFS"):
     elif strategy == "Genetic Algorithm":
         solution, solving_time, observable_history = genetic_algorithm_solve(
             start_state, goal_state)
-        if solution and solution.board == goal_state:
+        if solution and solution.packed == goal_packed:
             logging.debug(
                 f"Genetic Algorithm found solution in {solution.moves} moves")
         else:
@@ -1593,7 +2765,7 @@ def solve_puzzle(start_state, goal_state, strategy="BFS"):
 
     elif strategy == "AND-OR Graph Search":
         solution, solving_time, observable_history = and_or_graph_search(
-            start_state, goal_state)
+            start_state, goal_state, heuristic)
         return solution, solving_time, observable_history
 
     elif strategy == "Search with No Observation":
@@ -1619,6 +2791,15 @@ def solve_puzzle(start_state, goal_state, strategy="BFS"):
     elif strategy == "Q-Learning":
         return q_learning_solve(start_state, goal_state)
 
+    elif strategy == "Oracle":
+        return oracle_solve(start_state, goal_state)
+
+    elif strategy == "Value Iteration":
+        return value_iteration_solve(start_state, goal_state)
+
+    elif strategy == "Bidirectional BFS":
+        return bidirectional_bfs_solve(start_state, goal_state)
+
     logging.debug(f"Unknown strategy {strategy}")
     return None, time.time() - start_time, []
 
@@ -1721,15 +2902,15 @@ class PuzzleApp:
                         fg="#000000" if value == 0 else "#2c3e50"
                     )
         algorithm_groups = {
-            "Tìm kiếm có thông tin": ["Greedy", "A*", "IDA*"],
-            "Tìm kiếm không có thông tin": ["BFS", "DFS", "UCS", "IDS"],
+            "Tìm kiếm có thông tin": ["Greedy", "A*", "IDA*", "Oracle"],
+            "Tìm kiếm không có thông tin": ["BFS", "Bidirectional BFS", "DFS", "UCS", "IDS"],
             "Tìm kiếm cục bộ": ["Simple Hill Climbing", "Steepest-Hill Climbing",
                                 "Stochastic Hill Climbing", "Simulated Annealing",
                                 "Local Beam Search", "Genetic Algorithm"],
             "Tìm kiếm trong môi trường phức tạp": ["AND-OR Graph Search", "Search with No Observation",
                                                    "Search with Partial Observations"],
             "Tìm kiếm ràng buộc": ["Backtracking", "AC3", "Generate and Test"],
-            "Tìm kiếm học tăng cường": ["Q-Learning"]
+            "Tìm kiếm học tăng cường": ["Q-Learning", "Value Iteration"]
         }
         control_frame = tk.Frame(parent, bg="#2c3e50")
         control_frame.pack(fill=tk.BOTH, pady=10, padx=10)
@@ -1780,6 +2961,13 @@ class PuzzleApp:
         self.algo_submenu.pack(fill=tk.X, pady=5)
         self.algo_submenu.bind("<<ComboboxSelected>>",
                                self.on_algorithm_change)
+        tk.Label(control_frame, text="Hàm Heuristic:", font=("Helvetica", 12, "bold"),
+                 bg="#2c3e50", fg="#ecf0f1").pack(anchor="w", pady=(5, 3))
+        self.heuristic_var = tk.StringVar(value=DEFAULT_HEURISTIC)
+        self.heuristic_menu = ttk.Combobox(control_frame, textvariable=self.heuristic_var,
+                                           values=list(HEURISTICS),
+                                           style="Modern.TCombobox", state="readonly", width=18)
+        self.heuristic_menu.pack(fill=tk.X, pady=5)
         button_container = tk.Frame(control_frame, bg="#2c3e50")
         button_container.pack(fill=tk.X, pady=6)
         button_container.grid_columnconfigure(0, weight=1)
@@ -1906,7 +3094,8 @@ class PuzzleApp:
                 return
             solutions = []
             for state in belief_states:
-                result = solve_puzzle(state, self.goal_board, algorithm)
+                result = solve_puzzle(state, self.goal_board, algorithm,
+                                      self.heuristic_var.get())
                 if result is None:
                     messagebox.showerror(
                         "Lỗi", f"Không tìm thấy lời giải cho trạng thái niềm tin với {algorithm}.")
@@ -1952,7 +3141,8 @@ class PuzzleApp:
                     messagebox.showerror(
                         "Lỗi", "Trạng thái ban đầu không khả thi.")
                     return
-                result = solve_puzzle(start_board, goal_board, algorithm)
+                result = solve_puzzle(start_board, goal_board, algorithm,
+                                      self.heuristic_var.get())
                 if result is None:
                     messagebox.showerror(
                         "Lỗi", f"Không tìm thấy lời giải với {algorithm}.")
@@ -2170,15 +3360,15 @@ class PuzzleApp:
 
     def show_algorithm_menu(self, group_name):
         algorithm_groups = {
-            "Tìm kiếm có thông tin": ["Greedy", "A*", "IDA*"],
-            "Tìm kiếm không có thông tin": ["BFS", "DFS", "UCS", "IDS"],
+            "Tìm kiếm có thông tin": ["Greedy", "A*", "IDA*", "Oracle"],
+            "Tìm kiếm không có thông tin": ["BFS", "Bidirectional BFS", "DFS", "UCS", "IDS"],
             "Tìm kiếm cục bộ": ["Simple Hill Climbing", "Steepest-Hill Climbing",
                                 "Stochastic Hill Climbing", "Simulated Annealing",
                                 "Local Beam Search", "Genetic Algorithm"],
             "Tìm kiếm trong môi trường phức tạp": ["AND-OR Graph Search", "Search with No Observation",
                                                    "Search with Partial Observations"],
             "Tìm kiếm ràng buộc": ["Backtracking", "AC3", "Generate and Test"],
-            "Tìm kiếm học tăng cường": ["Q-Learning"]
+            "Tìm kiếm học tăng cường": ["Q-Learning", "Value Iteration"]
         }
         self.algo_submenu['values'] = algorithm_groups.get(group_name, [])
         if algorithm_groups.get(group_name):